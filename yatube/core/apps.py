@@ -1,7 +1,19 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import autodiscover_modules
 
 
 class CoreConfig(AppConfig):
     """Создание конфигурации приложения core."""
 
     name = 'core'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .auth import invalidate_user
+
+        post_save.connect(invalidate_user, sender=get_user_model())
+        post_delete.connect(invalidate_user, sender=get_user_model())
+        # Регистрирует фоновые задачи из модулей tasks приложений.
+        autodiscover_modules('tasks')
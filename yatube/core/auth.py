@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def _key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берет пользователя сессии из кэша.
+
+    AuthenticationMiddleware вызывает get_user на каждом запросе;
+    объект пользователя хранится AUTH_USER_CACHE_TIME секунд и
+    сбрасывается при любом сохранении или удалении пользователя, в том
+    числе при смене пароля и last_login. Сброс виден другим процессам
+    только в общем кэше, поэтому без SHARED_CACHE пользователь читается
+    из базы.
+    """
+
+    def get_user(self, user_id):
+        if not settings.SHARED_CACHE:
+            return super().get_user(user_id)
+        user = cache.get(_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(_key(user_id), user, settings.AUTH_USER_CACHE_TIME)
+        return user if self.user_can_authenticate(user) else None
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
+
+
+def invalidate_user(sender, instance, **kwargs):
+    invalidate(instance.pk)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.security, deploy=True)
+def check_sendfile_backend(app_configs, **kwargs):
+    """Без DEBUG файлы после проверки доступа должен отдавать прокси."""
+    if settings.DEBUG or settings.SENDFILE_BACKEND in ('nginx', 'apache'):
+        return []
+    return [
+        Error(
+            'SENDFILE_BACKEND не задан: media и архивы выгрузки отдает '
+            'процесс Django.',
+            hint="Укажите 'nginx' или 'apache' и internal-адреса "
+                 'SENDFILE_LOCATIONS в конфигурации прокси.',
+            id='core.E001',
+        )
+    ]
@@ -0,0 +1,76 @@
+import os
+import threading
+from functools import partial
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд PostgreSQL, берущий соединения из пула процесса.
+
+    Параметры пула задаются ключом POOL в настройках базы:
+    MAX_SIZE, TIMEOUT и CHECK_INTERVAL — через сколько секунд простоя
+    соединение перед выдачей проверяется запросом SELECT 1.
+    """
+
+    @property
+    def pool(self):
+        key = (os.getpid(), self.alias)
+        with _pools_lock:
+            if key not in _pools:
+                options = self.settings_dict.get('POOL', {})
+                _pools[key] = ConnectionPool(
+                    alias=self.alias,
+                    is_healthy=self._is_healthy,
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 10),
+                )
+            return _pools[key]
+
+    def _is_healthy(self, connection, idle_seconds):
+        if connection.closed:
+            return False
+        check_interval = self.settings_dict.get('POOL', {}).get(
+            'CHECK_INTERVAL', 30
+        )
+        if idle_seconds < check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        return self.pool.acquire(
+            partial(super().get_new_connection, conn_params)
+        )
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self.pool.release(self.connection, self._reset_for_reuse())
+
+    def _reset_for_reuse(self):
+        """Готовит соединение к возврату в пул; False — закрыть его."""
+        connection = self.connection
+        if self.in_atomic_block or connection.closed:
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                return False
+        return True
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+
+from core import metrics
+
+
+class PoolTimeout(Exception):
+    """Свободное соединение не освободилось за отведенное время."""
+
+
+class ConnectionPool:
+    """Пул соединений одного процесса.
+
+    Отдает последнее возвращенное живое соединение, перед выдачей
+    проверяет его через is_healthy и не держит больше max_size
+    соединений одновременно.
+    """
+
+    def __init__(self, alias, is_healthy, max_size, timeout):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self._is_healthy = is_healthy
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def acquire(self, connect):
+        """Выдает соединение, при нехватке открывая новое через connect."""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            metrics.incr('db_pool_timeouts_total', alias=self.alias)
+            raise PoolTimeout(
+                f'Нет свободных соединений с {self.alias} '
+                f'за {self.timeout} с.'
+            )
+        metrics.observe(
+            'db_pool_wait_seconds', time.monotonic() - start, alias=self.alias
+        )
+        try:
+            connection = self._take_idle()
+            if connection is None:
+                connection = connect()
+                with self._lock:
+                    self.size += 1
+        except BaseException:
+            self._slots.release()
+            raise
+        self._report()
+        return connection
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул или закрывает его."""
+        if reusable:
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        else:
+            self._discard(connection)
+        self._slots.release()
+        self._report()
+
+    def _take_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, released_at = self._idle.pop()
+            if self._is_healthy(connection, time.monotonic() - released_at):
+                return connection
+            self._discard(connection)
+
+    def _discard(self, connection):
+        with self._lock:
+            self.size -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _report(self):
+        with self._lock:
+            size, idle = self.size, len(self._idle)
+        metrics.set_gauge('db_pool_size', size, alias=self.alias)
+        metrics.set_gauge('db_pool_idle', idle, alias=self.alias)
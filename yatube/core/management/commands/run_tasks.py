@@ -0,0 +1,91 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core import tasks
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Обработчик фоновых задач."""
+
+    help = (
+        'Выполняет задачи из очереди core.Task. Запускает --processes '
+        'процессов, каждый забирает задачи пачками по --batch-size; с '
+        '--once завершается, когда готовых задач не осталось.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASK_WORKERS
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TASK_BATCH_SIZE
+        )
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            done = self.loop(options['batch_size'], options['once'])
+            self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}.'))
+            return
+        # Дочерние процессы не должны делить соединения с родителем.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=self.child,
+                args=(options['batch_size'], options['once']),
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGTERM, lambda *args: self._stop(workers))
+        for worker in workers:
+            worker.join()
+
+    def _stop(self, workers):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+
+    def child(self, batch_size, once):
+        """Дочерний процесс закрывает свои соединения перед выходом."""
+        try:
+            self.loop(batch_size, once)
+        finally:
+            connections.close_all()
+
+    def loop(self, batch_size, once):
+        """Цикл одного процесса; SIGTERM дает доделать текущую пачку."""
+        stopping = []
+        previous = signal.signal(
+            signal.SIGTERM, lambda *args: stopping.append(True)
+        )
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        done = 0
+        while not stopping:
+            try:
+                tasks.requeue_stale()
+                claimed = tasks.work(name, batch_size)
+            except DatabaseError:
+                # Например, база недоступна или SQLite занята другим
+                # процессом: пробуем снова после паузы.
+                logger.exception('Не удалось получить задачи')
+                connections.close_all()
+                claimed = -1
+            done += max(claimed, 0)
+            if claimed <= 0:
+                if once and claimed == 0:
+                    break
+                time.sleep(settings.TASK_POLL_INTERVAL)
+        signal.signal(signal.SIGTERM, previous)
+        return done
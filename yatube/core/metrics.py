@@ -0,0 +1,42 @@
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def incr(name, value=1, **labels):
+    """Увеличивает счетчик."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name, value, **labels):
+    """Запоминает текущее значение показателя."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    """Учитывает длительность: сумму и количество наблюдений."""
+    with _lock:
+        _counters[_key(f'{name}_sum', labels)] += value
+        _counters[_key(f'{name}_count', labels)] += 1
+
+
+def render():
+    """Метрики процесса в текстовом формате Prometheus."""
+    with _lock:
+        samples = sorted({**_counters, **_gauges}.items())
+    lines = []
+    for (name, labels), value in samples:
+        if labels:
+            label_text = ','.join(f'{key}="{val}"' for key, val in labels)
+            name = f'{name}{{{label_text}}}'
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
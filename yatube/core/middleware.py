@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+
+from . import routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Ключ сессии со временем, до которого чтение идет с основной базы.
+PIN_SESSION_KEY = '_db_pinned_until'
+
+
+class ReplicaRoutingMiddleware:
+    """Включает чтение с реплик для безопасных запросов.
+
+    После успешного изменяющего запроса или любого запроса с записью в
+    базу (подписка, например, идет через GET) сессия пользователя на
+    REPLICA_PIN_SECONDS закрепляется за основной базой, чтобы он
+    сразу увидел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.session.get(PIN_SESSION_KEY, 0) > time.time()
+        routers.read_from_replica(
+            request.method in SAFE_METHODS and not pinned
+        )
+        try:
+            response = self.get_response(request)
+            written = routers.has_written()
+        finally:
+            routers.read_from_replica(False)
+
+        changed = (
+            request.method not in SAFE_METHODS and response.status_code < 400
+        )
+        if written or changed:
+            request.session[PIN_SESSION_KEY] = (
+                time.time() + settings.REPLICA_PIN_SECONDS
+            )
+        return response
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class UniversalModel(models.Model):
@@ -6,8 +7,77 @@ class UniversalModel(models.Model):
 
     pub_date = models.DateTimeField(
         auto_now_add=True,
+        db_index=True,
         verbose_name='Дата публикации',
     )
 
     class Meta:
         abstract = True
+
+
+class Task(models.Model):
+    """Фоновая задача очереди core.tasks."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    payload = models.TextField(
+        default='{}',
+        verbose_name='Аргументы в JSON',
+    )
+    status = models.CharField(
+        max_length=7,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние',
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет',
+        help_text='Задачи с большим приоритетом выполняются раньше',
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='Максимум попыток',
+    )
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name='Обработчик',
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу',
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена в очередь',
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'), name='core_task_claim_idx'
+            ),
+        )
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
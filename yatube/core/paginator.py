@@ -0,0 +1,102 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# Версия, общая для всех лент: ее меняют массовые операции.
+GLOBAL_SCOPE = 'all'
+
+
+def _version_key(scope):
+    return f'paginator:version:{scope}'
+
+
+def versions(*scopes):
+    """Текущие версии лент scopes одной строкой."""
+    keys = [_version_key(scope) for scope in (GLOBAL_SCOPE, *scopes)]
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return ':'.join(found[key] for key in keys)
+
+
+def invalidate_counts(*scopes):
+    """Меняет версии лент scopes: их закэшированные страницы устаревают.
+
+    Без аргументов сбрасываются все ленты сразу.
+    """
+    cache.set_many(
+        {
+            _version_key(scope): uuid.uuid4().hex
+            for scope in scopes or (GLOBAL_SCOPE, )
+        },
+        None,
+    )
+
+
+class HasNextPaginator(Paginator):
+    """Paginator, который не считает объекты ленты.
+
+    Страница выбирается с одним лишним объектом: по нему видно, есть ли
+    следующая, поэтому count известен только до следующей страницы
+    включительно, и ссылки ведут не дальше нее. COUNT(*) выполняется,
+    лишь когда запрошена страница за концом ленты, чтобы отдать
+    последнюю. Page и сам Paginator остаются стандартными.
+
+    С recent_field страница сначала выбирается только среди объектов
+    за последние PAGINATOR_RECENT_DAYS дней: лента отсортирована по
+    этому полю по убыванию, поэтому такие объекты идут первыми, а
+    условие по дате позволяет PostgreSQL читать только свежие секции
+    таблицы. Если свежих объектов на страницу не хватает, она
+    выбирается из всей ленты.
+    """
+
+    def __init__(self, object_list, per_page, recent_field=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.recent_field = recent_field
+
+    def validate_number(self, number):
+        """Проверяет номер страницы, не считая объекты."""
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            return self.page(self.num_pages)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = self._slice(bottom, bottom + self.per_page + 1)
+        if not objects and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        self.count = bottom + len(objects)
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(objects[:self.per_page], number, self)
+
+    def _slice(self, bottom, top):
+        if self.recent_field:
+            since = timezone.now() - timedelta(
+                days=settings.PAGINATOR_RECENT_DAYS
+            )
+            recent = list(self.object_list.filter(
+                **{f'{self.recent_field}__gte': since}
+            )[bottom:top])
+            if len(recent) == top - bottom:
+                return recent
+        return list(self.object_list[bottom:top])
@@ -0,0 +1,407 @@
+import re
+from datetime import datetime
+
+from django.db import NotSupportedError
+from django.db.migrations.operations.base import Operation
+from django.utils import timezone
+
+DEFAULT_SUFFIX = '_default'
+
+_MONTH_SUFFIX = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def month_start(value):
+    """Начало месяца value в UTC."""
+    value = timezone.localtime(value, timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=month_index + 1)
+
+
+def partition_name(table, month):
+    return f'{table}_y{month.year}m{month.month:02d}'
+
+
+def partition_month(name):
+    """Месяц секции по ее имени или None для секции по умолчанию."""
+    match = _MONTH_SUFFIX.search(name)
+    if match is None:
+        return None
+    year, month = map(int, match.groups())
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def partitioned_tables(cursor):
+    cursor.execute(
+        'SELECT c.relname FROM pg_partitioned_table p '
+        'JOIN pg_class c ON c.oid = p.partrelid '
+        'WHERE pg_table_is_visible(c.oid) ORDER BY c.relname'
+    )
+    return [name for name, in cursor.fetchall()]
+
+
+def partitions(cursor, table):
+    """Имена секций таблицы."""
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid '
+        'JOIN pg_class p ON p.oid = i.inhparent '
+        'WHERE p.relname = %s ORDER BY c.relname',
+        [table],
+    )
+    return [name for name, in cursor.fetchall()]
+
+
+def create_partition(cursor, quote_name, table, month):
+    """Создает секцию table за месяц month, если ее еще нет."""
+    name = quote_name(partition_name(table, month))
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF '
+        f'{quote_name(table)} FOR VALUES FROM (%s) TO (%s)',
+        [month, add_months(month, 1)],
+    )
+
+
+def detach_partition(cursor, quote_name, table, name, archive_schema=None):
+    """Отсоединяет секцию; с archive_schema переносит ее в эту схему."""
+    cursor.execute(
+        f'ALTER TABLE {quote_name(table)} DETACH PARTITION {quote_name(name)}'
+    )
+    if archive_schema:
+        cursor.execute(
+            f'CREATE SCHEMA IF NOT EXISTS {quote_name(archive_schema)}'
+        )
+        cursor.execute(
+            f'ALTER TABLE {quote_name(name)} '
+            f'SET SCHEMA {quote_name(archive_schema)}'
+        )
+
+
+def _views(cursor, table):
+    """Представления, читающие таблицу: (имя, вид, определение)."""
+    cursor.execute(
+        'SELECT DISTINCT v.relname, v.relkind, pg_get_viewdef(v.oid) '
+        'FROM pg_depend d '
+        'JOIN pg_rewrite r ON r.oid = d.objid '
+        'JOIN pg_class v ON v.oid = r.ev_class '
+        'WHERE d.classid = %s::regclass AND d.refobjid = %s::regclass '
+        'AND v.oid <> d.refobjid ORDER BY v.relname',
+        ['pg_rewrite', table],
+    )
+    return cursor.fetchall()
+
+
+def _references(cursor, table):
+    """Внешние ключи других таблиц на table: (таблица, имя, определение)."""
+    cursor.execute(
+        'SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) '
+        'FROM pg_constraint WHERE contype = %s AND confrelid = %s::regclass '
+        'AND conparentid = 0 ORDER BY conname',
+        ['f', table],
+    )
+    return cursor.fetchall()
+
+
+def _triggers(cursor, table):
+    """Определения пользовательских триггеров самой таблицы."""
+    cursor.execute(
+        'SELECT pg_get_triggerdef(oid) FROM pg_trigger '
+        'WHERE tgrelid = %s::regclass AND NOT tgisinternal '
+        'AND tgparentid = 0 ORDER BY tgname',
+        [table],
+    )
+    return [definition for definition, in cursor.fetchall()]
+
+
+class PartitionByMonth(Operation):
+    """Секционирует таблицу модели по месяцам поля column.
+
+    Работает только на PostgreSQL 11+: таблица пересоздается
+    секционированной, первичный ключ дополняется полем секционирования,
+    строки переносятся в помесячные секции, индексы и внешние ключи
+    модели создаются заново. На остальных базах, например SQLite в
+    тестах, таблица остается обычной.
+
+    Перенос идет под блокировкой ACCESS EXCLUSIVE всей таблицы и
+    переписывает все строки: на большой таблице миграцию нужно
+    проводить в окно обслуживания.
+
+    Зависимые объекты удаляются и создаются заново явно, без CASCADE:
+    представления по сохраненному определению, пользовательские
+    триггеры таблицы — по pg_get_triggerdef. Права на представления и
+    индексы, созданные вне Django, не переносятся.
+
+    Внешние ключи, ссылающиеся на такую таблицу, должны быть объявлены
+    с db_constraint=False: PostgreSQL не позволяет ссылаться на id, если
+    уникальность держится только вместе с полем секционирования. Если
+    такой ключ остался в базе, миграция останавливается с ошибкой, а
+    не удаляет его молча. Целостность таких связей проверяет
+    EnforceReference.
+    """
+
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, model_name, column, months_ahead=3):
+        self.model_name = model_name
+        self.column = column
+        self.months_ahead = months_ahead
+
+    def deconstruct(self):
+        return (
+            self.__class__.__name__,
+            [self.model_name, self.column],
+            {'months_ahead': self.months_ahead},
+        )
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            model = to_state.apps.get_model(app_label, self.model_name)
+            self._rebuild(schema_editor, model, partitioned=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            model = to_state.apps.get_model(app_label, self.model_name)
+            self._rebuild(schema_editor, model, partitioned=False)
+
+    def describe(self):
+        return f'Partition {self.model_name} by month of {self.column}'
+
+    def _rebuild(self, schema_editor, model, partitioned):
+        quote = schema_editor.quote_name
+        table = model._meta.db_table
+        pk = model._meta.pk.column
+        old = f'{table}_old'
+
+        def execute(sql):
+            # Без параметров: в определениях представлений бывает %.
+            schema_editor.execute(sql, None)
+
+        dependents = self._drop_dependents(schema_editor, table, partitioned)
+        execute(f'ALTER TABLE {quote(table)} RENAME TO {quote(old)}')
+        definition = (
+            f'CREATE TABLE {quote(table)} (LIKE {quote(old)} '
+            'INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        if partitioned:
+            key = f'{quote(pk)}, {quote(self.column)}'
+            execute(
+                f'{definition} PARTITION BY RANGE ({quote(self.column)})'
+            )
+            self._create_partitions(schema_editor, table, old)
+        else:
+            key = quote(pk)
+            execute(definition)
+
+        execute(f'INSERT INTO {quote(table)} SELECT * FROM {quote(old)}')
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_get_serial_sequence(%s, %s)', [old, pk]
+            )
+            sequence, = cursor.fetchone()
+        if sequence:
+            execute(
+                f'ALTER SEQUENCE {sequence} '
+                f'OWNED BY {quote(table)}.{quote(pk)}'
+            )
+        # Зависимости уже сняты: если что-то осталось, DROP без CASCADE
+        # остановит миграцию, а не удалит это молча.
+        execute(f'DROP TABLE {quote(old)}')
+
+        # Имена ключа и индексов освобождаются только вместе со старой
+        # таблицей.
+        execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY ({key})')
+        for statement in schema_editor._model_indexes_sql(model):
+            execute(str(statement))
+        for field in model._meta.local_fields:
+            if field.remote_field and field.db_constraint:
+                execute(str(schema_editor._create_fk_sql(
+                    model, field, '_fk_%(to_table)s_%(to_column)s'
+                )))
+        for statement in dependents:
+            execute(statement)
+
+    def _create_partitions(self, schema_editor, table, old):
+        """Секция по умолчанию и помесячные секции от первой строки old."""
+        quote = schema_editor.quote_name
+        schema_editor.execute(
+            f'CREATE TABLE {quote(table + DEFAULT_SUFFIX)} '
+            f'PARTITION OF {quote(table)} DEFAULT'
+        )
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT MIN({quote(self.column)}) FROM {quote(old)}'
+            )
+            first, = cursor.fetchone()
+            month = month_start(first or timezone.now())
+            last = add_months(month_start(timezone.now()), self.months_ahead)
+            while month <= last:
+                create_partition(cursor, quote, table, month)
+                month = add_months(month, 1)
+
+    def _drop_dependents(self, schema_editor, table, partitioned):
+        """Удаляет зависимые от table объекты.
+
+        Возвращает команды, которые создают их заново на новой таблице.
+        """
+        quote = schema_editor.quote_name
+        with schema_editor.connection.cursor() as cursor:
+            views = _views(cursor, table)
+            references = _references(cursor, table)
+            restore = _triggers(cursor, table)
+        if partitioned and references:
+            raise NotSupportedError(
+                f'На {table} ссылаются внешние ключи '
+                f'{", ".join(name for _, name, _ in references)}: '
+                'объявите их с db_constraint=False.'
+            )
+        for source, name, constraint in references:
+            schema_editor.execute(
+                f'ALTER TABLE {source} DROP CONSTRAINT {quote(name)}'
+            )
+            restore.append(
+                f'ALTER TABLE {source} ADD CONSTRAINT {quote(name)} '
+                f'{constraint}'
+            )
+        for name, kind, query in views:
+            kind = 'MATERIALIZED VIEW' if kind == 'm' else 'VIEW'
+            schema_editor.execute(f'DROP {kind} {quote(name)}')
+            restore.append(f'CREATE {kind} {quote(name)} AS {query}')
+        return restore
+
+
+class EnforceReference(Operation):
+    """Проверяет ссылку field модели model_name триггерами PostgreSQL.
+
+    Замена внешнего ключа для полей с db_constraint=False, которые
+    ссылаются на секционированную таблицу: вставка или изменение ссылки
+    на несуществующую строку и удаление строки, на которую еще
+    ссылаются, завершаются ошибкой foreign_key_violation. Как и
+    внешний ключ, проверка блокирует строку родителя FOR KEY SHARE,
+    но выполняется сразу, а не в конце транзакции. Каскадное удаление и
+    SET_NULL по-прежнему выполняет Django. На остальных базах операция
+    ничего не делает.
+    """
+
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, model_name, name):
+        self.model_name = model_name
+        self.name = name
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.model_name, self.name], {})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            model = to_state.apps.get_model(app_label, self.model_name)
+            for statement in self._create_sql(schema_editor, model):
+                schema_editor.execute(statement, None)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            model = from_state.apps.get_model(app_label, self.model_name)
+            for statement in self._delete_sql(schema_editor, model):
+                schema_editor.execute(statement, None)
+
+    def describe(self):
+        return f'Enforce reference {self.model_name}.{self.name}'
+
+    def _names(self, schema_editor, model):
+        field = model._meta.get_field(self.name)
+        table = model._meta.db_table
+        target = field.related_model._meta
+        return (
+            table,
+            field.column,
+            target.db_table,
+            field.target_field.column,
+            schema_editor._create_index_name(table, [field.column], '_ref'),
+            schema_editor._create_index_name(
+                target.db_table, [table, field.column], '_ref'
+            ),
+        )
+
+    def _create_sql(self, schema_editor, model):
+        quote = schema_editor.quote_name
+        table, column, target, target_column, check, restrict = (
+            self._names(schema_editor, model)
+        )
+        return [
+            f"""
+            CREATE FUNCTION {quote(check)}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF NEW.{quote(column)} IS NOT NULL THEN
+                    PERFORM 1 FROM {quote(target)}
+                    WHERE {quote(target_column)} = NEW.{quote(column)}
+                    FOR KEY SHARE;
+                    IF NOT FOUND THEN
+                        RAISE foreign_key_violation USING MESSAGE = format(
+                            '{table}.{column} = %s: no row in {target}',
+                            NEW.{quote(column)}
+                        );
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+            """,
+            f'CREATE TRIGGER {quote(check)} '
+            f'AFTER INSERT OR UPDATE OF {quote(column)} ON {quote(table)} '
+            f'FOR EACH ROW EXECUTE FUNCTION {quote(check)}()',
+            # Перенос строки между секциями при смене поля
+            # секционирования выглядит как удаление: строка с тем же
+            # ключом при этом остается в таблице.
+            f"""
+            CREATE FUNCTION {quote(restrict)}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                PERFORM 1 FROM {quote(table)}
+                WHERE {quote(column)} = OLD.{quote(target_column)} LIMIT 1;
+                IF FOUND THEN
+                    PERFORM 1 FROM {quote(target)}
+                    WHERE {quote(target_column)} = OLD.{quote(target_column)};
+                    IF NOT FOUND THEN
+                        RAISE foreign_key_violation USING MESSAGE = format(
+                            '{target}.{target_column} = %s '
+                            'is still referenced from {table}',
+                            OLD.{quote(target_column)}
+                        );
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END
+            $$
+            """,
+            f'CREATE TRIGGER {quote(restrict)} '
+            f'AFTER DELETE OR UPDATE OF {quote(target_column)} '
+            f'ON {quote(target)} '
+            f'FOR EACH ROW EXECUTE FUNCTION {quote(restrict)}()',
+        ]
+
+    def _delete_sql(self, schema_editor, model):
+        quote = schema_editor.quote_name
+        table, _, target, _, check, restrict = (
+            self._names(schema_editor, model)
+        )
+        return [
+            f'DROP TRIGGER {quote(check)} ON {quote(table)}',
+            f'DROP FUNCTION {quote(check)}()',
+            f'DROP TRIGGER {quote(restrict)} ON {quote(target)}',
+            f'DROP FUNCTION {quote(restrict)}()',
+        ]
@@ -0,0 +1,132 @@
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from . import metrics
+
+
+# Сколько раз и с какой паузой в секундах ждать замок корзины.
+_LOCK_ATTEMPTS = 20
+_LOCK_PAUSE = 0.005
+
+
+@contextmanager
+def _locked(key):
+    """Замок корзины key на время чтения и записи ее состояния.
+
+    В API кэша Django нет сравнения с обменом, поэтому замок — ключ,
+    созданный атомарным add. Если замок не освобождается, например его
+    держал упавший процесс, корзина меняется без него: в худшем случае
+    пропускается лишний запрос, но запрос не ждет дольше 0,1 секунды.
+    """
+    lock = f'{key}:lock'
+    for _ in range(_LOCK_ATTEMPTS):
+        if cache.add(lock, 1, 1):
+            break
+        time.sleep(_LOCK_PAUSE)
+    else:
+        yield
+        return
+    try:
+        yield
+    finally:
+        cache.delete(lock)
+
+
+def _take(key, capacity, period):
+    """Берет жетон из корзины key, возвращает секунды до следующего.
+
+    Корзина хранится одним ключом: число жетонов и время последнего
+    пополнения. При каждом обращении она пополняется пропорционально
+    прошедшему времени, capacity жетонов за period секунд, но не больше
+    capacity. Полная корзина не отличается от отсутствующей, поэтому
+    ключ живет period секунд. Ожидание не бывает меньше секунды.
+    """
+    rate = capacity / period
+    with _locked(key):
+        now = time.time()
+        tokens, last = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - last, 0) * rate)
+        if tokens >= 1:
+            cache.set(key, (tokens - 1, now), period)
+            return 0
+        cache.set(key, (tokens, now), period)
+    return max((1 - tokens) / rate, 1)
+
+
+def _refund(key, capacity, period):
+    """Возвращает взятый жетон в корзину key."""
+    with _locked(key):
+        state = cache.get(key)
+        if state is not None:
+            tokens, last = state
+            cache.set(key, (min(tokens + 1, capacity), last), period)
+
+
+def _client_ip(request):
+    """IP-адрес клиента.
+
+    За прокси REMOTE_ADDR — адрес самого прокси, поэтому адрес берется
+    из заголовка CLIENT_IP_HEADER, который выставляет прокси. В
+    X-Forwarded-For доверять можно только последнему адресу: его
+    дописал наш прокси, остальные прислал клиент.
+    """
+    header = settings.CLIENT_IP_HEADER
+    if header and request.META.get(header):
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _take_all(scope, limits, identities):
+    """Берет по жетону из корзины каждой личности.
+
+    Если какая-то корзина пуста, уже взятые жетоны возвращаются, и
+    отказ не тратит лимит других корзин. Возвращает секунды ожидания.
+    """
+    taken = []
+    for kind, identity in identities.items():
+        if kind not in limits:
+            continue
+        key = f'ratelimit:{scope}:{kind}:{identity}'
+        wait = _take(key, *limits[kind])
+        if wait:
+            for key, limit in taken:
+                _refund(key, *limit)
+            return wait
+        taken.append((key, limits[kind]))
+    return 0
+
+
+def rate_limit(scope, methods=('POST', )):
+    """Ограничивает частоту запросов к view корзиной жетонов.
+
+    Жетоны считаются отдельно для пользователя и для IP-адреса:
+    RATE_LIMITS[scope] задает для 'user' и 'ip' размер корзины и время
+    ее наполнения в секундах. При превышении отдается 429 с заголовком
+    Retry-After.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limits = settings.RATE_LIMITS.get(scope, {})
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            identities = {'ip': _client_ip(request)}
+            if request.user.is_authenticated:
+                identities['user'] = request.user.pk
+            wait = _take_all(scope, limits, identities)
+            if not wait:
+                return view(request, *args, **kwargs)
+            metrics.incr('ratelimit_throttled_total', scope=scope)
+            response = render(
+                request, 'core/429.html', {'retry_after': wait}, status=429
+            )
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+        return wrapper
+    return decorator
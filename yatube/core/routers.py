@@ -0,0 +1,50 @@
+import random
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def read_from_replica(enabled):
+    """Разрешает или запрещает чтение с реплик в текущем потоке.
+
+    Заодно сбрасывает отметку о записи, см. has_written.
+    """
+    _state.read_from_replica = enabled
+    _state.written = False
+
+
+def has_written():
+    """Была ли запись в основную базу после read_from_replica."""
+    return getattr(_state, 'written', False)
+
+
+class ReplicaRouter:
+    """Направляет чтение безопасных запросов на реплики.
+
+    Запись и все запросы вне ReplicaRoutingMiddleware идут в default.
+    После первой записи чтение до конца запроса тоже идет в default.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if replicas and getattr(_state, 'read_from_replica', False):
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.read_from_replica = False
+        _state.written = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,126 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# Размер блока при отдаче части файла.
+BLOCK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _parse_range(header, size):
+    """(start, end) включительно для одного диапазона из Range.
+
+    None — заголовка нет или он не разобран: отдается весь файл.
+    Диапазон за концом файла дает ValueError.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            block = source.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _file_response(request, path, content_type, stat):
+    """Отдача файла самим Django с поддержкой Range для локальной работы."""
+    try:
+        byte_range = _parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read(path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def send_file(request, location, name, as_attachment=False, filename=None):
+    """Отдает файл name из места хранения location после проверки доступа.
+
+    Места хранения описаны в SENDFILE_LOCATIONS: настройка с корнем на
+    диске и внутренний адрес прокси. С SENDFILE_BACKEND 'nginx' или
+    'apache' ответ пустой, файл отдает прокси по X-Accel-Redirect или
+    X-Sendfile, поэтому процесс Django не занят передачей. Без прокси
+    файл отдается FileResponse с поддержкой Range.
+    """
+    root_setting, internal_url = settings.SENDFILE_LOCATIONS[location]
+    try:
+        path = safe_join(getattr(settings, root_setting), name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    stat = os.stat(path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime, stat.st_size
+    ):
+        return HttpResponseNotModified()
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    backend = settings.SENDFILE_BACKEND
+    if backend == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = internal_url + quote(
+            name.replace(os.sep, '/')
+        )
+    elif backend == 'apache':
+        response = HttpResponse(content_type=content_type)
+        # mod_xsendfile раскодирует %-последовательности.
+        response['X-Sendfile'] = quote(path)
+    else:
+        response = _file_response(request, path, content_type, stat)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if as_attachment:
+        response['Content-Disposition'] = _disposition(
+            filename or os.path.basename(name)
+        )
+    return response
+
+
+def _disposition(filename):
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        return f"attachment; filename*=utf-8''{quote(filename)}"
+    return f'attachment; filename="{filename}"'
@@ -0,0 +1,100 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Файлы, которые имеет смысл сжимать заранее.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.json', '.xml', '.txt', '.html', '.map', '.ico',
+)
+
+# Файлы меньше этого размера не сжимаются.
+COMPRESS_MIN_SIZE = 256
+
+# Расширения сжатых копий в порядке предпочтения.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress(data):
+    """Сжатые варианты содержимого: {расширение: байты}."""
+    variants = {'.gz': gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    return {
+        extension: content
+        for extension, content in variants.items()
+        if len(content) < len(data)
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени и заранее сжатыми копиями.
+
+    collectstatic кладет рядом с каждым файлом .gz и, если установлен
+    brotli, .br. Пока манифест не собран, ссылки ведут на исходные
+    имена, как при DEBUG.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if not isinstance(processed, Exception):
+                names.update(filter(None, (name, hashed_name)))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            if self._compress(name):
+                yield name, None, True
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return False
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return False
+        variants = compress(data)
+        for extension, content in variants.items():
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(content))
+        return bool(variants)
+
+    def is_immutable(self, name):
+        """Имя содержит хэш содержимого и может кэшироваться навсегда."""
+        return name in self._hashed_names
+
+    @cached_property
+    def _hashed_names(self):
+        return set(self.hashed_files.values())
+
+    def encoded_path(self, name, accept_encoding):
+        """Путь к лучшему варианту файла для Accept-Encoding клиента.
+
+        Возвращает (путь, кодировка); кодировка None — файл без сжатия.
+        """
+        accepted = {
+            part.split(';')[0].strip().lower()
+            for part in accept_encoding.split(',')
+            if not part.replace(' ', '').endswith(';q=0')
+        }
+        path = self.path(name)
+        for encoding, extension in ENCODINGS:
+            if encoding in accepted and os.path.exists(path + extension):
+                return path + extension, encoding
+        return path, None
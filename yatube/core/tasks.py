@@ -0,0 +1,147 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name, max_attempts=3):
+    """Регистрирует функцию как задачу name.
+
+    Функции задач лежат в модулях tasks приложений; аргументы должны
+    сериализоваться в JSON.
+    """
+    def decorator(function):
+        _registry[name] = (function, max_attempts)
+        return function
+    return decorator
+
+
+def enqueue(name, *args, priority=0, run_at=None, **kwargs):
+    """Ставит задачу в очередь.
+
+    Запись создается в текущей транзакции: если она откатится, задачи
+    тоже не будет, а после фиксации задача не потеряется.
+    """
+    _, max_attempts = _registry.get(name, (None, 3))
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def claim(worker, batch_size):
+    """Забирает до batch_size готовых задач, самые приоритетные первыми.
+
+    На PostgreSQL строки берутся через SELECT … FOR UPDATE SKIP LOCKED,
+    поэтому обработчики не ждут друг друга и не получают одну задачу
+    дважды. Пачка только закрепляется за worker: перед выполнением
+    каждую задачу отмечает start.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Task.objects.select_for_update(skip_locked=True).filter(
+                status=Task.QUEUED, run_at__lte=now
+            ).order_by('-priority', 'run_at').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        Task.objects.filter(pk__in=ids).update(
+            status=Task.RUNNING, locked_by=worker, locked_at=now
+        )
+    return list(Task.objects.filter(pk__in=ids).order_by(
+        '-priority', 'run_at'
+    ))
+
+
+def start(job):
+    """Отмечает начало задачи и обновляет время ее блокировки.
+
+    Пока выполняется пачка, задачи в ее конце могут прождать дольше
+    TASK_LOCK_TIMEOUT: requeue_stale вернет их в очередь, и их заберет
+    другой обработчик. Тогда задача уже не закреплена за
+    job.locked_by, и start возвращает False.
+    """
+    now = timezone.now()
+    started = Task.objects.filter(
+        pk=job.pk, status=Task.RUNNING, locked_by=job.locked_by
+    ).update(locked_at=now, attempts=F('attempts') + 1)
+    if started:
+        job.locked_at = now
+        job.attempts += 1
+    return bool(started)
+
+
+def execute(job):
+    """Выполняет задачу; при ошибке откладывает повтор или сдается.
+
+    Повтор откладывается экспоненциально: TASK_RETRY_DELAY, вдвое
+    больше и так далее. Итог записывается, только если задача все еще
+    закреплена за этим обработчиком.
+    """
+    owned = Task.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    try:
+        function, _ = _registry[job.name]
+        payload = json.loads(job.payload)
+        function(*payload['args'], **payload['kwargs'])
+    except Exception:
+        logger.exception('Задача %s не выполнена', job)
+        job.last_error = traceback.format_exc()
+        job.locked_by, job.locked_at = '', None
+        if job.attempts < job.max_attempts:
+            job.status = Task.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=settings.TASK_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = Task.FAILED
+        if not owned.update(
+            status=job.status,
+            run_at=job.run_at,
+            last_error=job.last_error,
+            locked_by='',
+            locked_at=None,
+        ):
+            logger.warning('Задачу %s забрал другой обработчик', job)
+        metrics.incr('tasks_failed_total', task=job.name)
+        return False
+    deleted, _ = owned.delete()
+    if not deleted:
+        logger.warning('Задачу %s забрал другой обработчик', job)
+    metrics.incr('tasks_done_total', task=job.name)
+    return True
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи обработчиков, которые не доработали
+    дольше TASK_LOCK_TIMEOUT секунд, например из-за падения процесса."""
+    return Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.TASK_LOCK_TIMEOUT
+        ),
+    ).update(status=Task.QUEUED, locked_by='', locked_at=None)
+
+
+def work(worker, batch_size):
+    """Выполняет одну пачку задач, возвращает ее размер."""
+    jobs = claim(worker, batch_size)
+    for job in jobs:
+        if start(job):
+            execute(job)
+    return len(jobs)
@@ -0,0 +1,30 @@
+from django import template
+
+register = template.Library()
+
+# Сколько страниц показывается по обе стороны от текущей.
+PAGE_WINDOW = 2
+
+
+@register.filter
+def page_window(page, on_each_side=PAGE_WINDOW):
+    """Номера страниц вокруг текущей, первая и последняя известная.
+
+    Пропуски обозначаются None, поэтому длина списка не зависит от
+    общего числа страниц.
+    """
+    number, last = page.number, page.paginator.num_pages
+    window = range(
+        max(1, number - on_each_side), min(last, number + on_each_side) + 1
+    )
+    pages = []
+    if window.start > 1:
+        pages.append(1)
+    if window.start > 2:
+        pages.append(None)
+    pages.extend(window)
+    if window.stop < last:
+        pages.append(None)
+    if window.stop <= last:
+        pages.append(last)
+    return pages
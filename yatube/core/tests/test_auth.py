@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+CACHED_SESSIONS = 'django.contrib.sessions.backends.cached_db'
+
+
+def worker_cache(location):
+    """CACHES процесса, у которого свой locmem или общий кэш."""
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': location,
+        }
+    }
+
+
+@override_settings(SHARED_CACHE=True, SESSION_ENGINE=CACHED_SESSIONS)
+class CachedAuthTest(TestCase):
+    """Проверка сессий и пользователя сессии из кэша."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.user.refresh_from_db()
+        self.client.force_login(self.user)
+
+    def test_logged_in_page_makes_no_queries(self):
+        self.client.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_changes_are_seen(self):
+        self.client.get(reverse('about:author'))
+        self.user.first_name = 'Иван'
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'].first_name, 'Иван')
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.get(reverse('about:author'))
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+
+class WorkerSessionsTest(TestCase):
+    """Выход в одном процессе виден другому процессу."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+
+    def authenticated(self, location):
+        with self.settings(CACHES=worker_cache(location)):
+            response = self.client.get(reverse('about:author'))
+        return response.context['user'].is_authenticated
+
+    def logout(self, location):
+        """Выход с сохранением старой куки: ею может воспользоваться
+        тот, кто ее украл, или вкладка в другом окне."""
+        cookie = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        with self.settings(CACHES=worker_cache(location)):
+            self.client.get(reverse('users:logout'))
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+
+    def test_logout_without_shared_cache(self):
+        self.client.force_login(self.user)
+        self.assertTrue(self.authenticated('worker-a'))
+        self.assertTrue(self.authenticated('worker-b'))
+        self.logout('worker-a')
+        self.assertFalse(self.authenticated('worker-b'))
+
+    def test_password_change_without_shared_cache(self):
+        self.client.force_login(self.user)
+        self.assertTrue(self.authenticated('worker-b'))
+        with self.settings(CACHES=worker_cache('worker-a')):
+            self.user.set_password('new-password')
+            self.user.save()
+        self.assertFalse(self.authenticated('worker-b'))
+
+    @override_settings(SHARED_CACHE=True, SESSION_ENGINE=CACHED_SESSIONS)
+    def test_logout_with_shared_cache(self):
+        self.client.force_login(self.user)
+        self.assertTrue(self.authenticated('shared'))
+        self.logout('shared')
+        self.assertFalse(self.authenticated('shared'))
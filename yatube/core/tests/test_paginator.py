@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.paginator import HasNextPaginator, invalidate_counts, versions
+from core.templatetags.pagination import page_window
+from posts.models import Group, Post, User
+
+
+class PageWindowTest(SimpleTestCase):
+    """Проверка окна номеров страниц."""
+
+    def window(self, number, pages):
+        return page_window(Paginator(range(pages), 1).page(number))
+
+    def test_window(self):
+        cases = (
+            (1, 1, [1]),
+            (1, 4, [1, 2, 3, 4]),
+            (1, 1000, [1, 2, 3, None, 1000]),
+            (500, 1000, [1, None, 498, 499, 500, 501, 502, None, 1000]),
+            (4, 7, [1, 2, 3, 4, 5, 6, 7]),
+            (1000, 1000, [1, None, 998, 999, 1000]),
+        )
+        for number, pages, expected in cases:
+            with self.subTest(number=number, pages=pages):
+                self.assertEqual(self.window(number, pages), expected)
+
+
+class HasNextPaginatorTest(TestCase):
+    """Проверка пагинации без подсчета объектов."""
+
+    def setUp(self):
+        for number in range(5):
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='-',
+            )
+        self.groups = Group.objects.order_by('id')
+
+    def test_page_is_one_query(self):
+        """Страница — один запрос, следующая видна по лишнему объекту."""
+        with self.assertNumQueries(1):
+            page = HasNextPaginator(self.groups, 2).get_page(2)
+            self.assertEqual(len(page), 2)
+            self.assertTrue(page.has_next())
+            self.assertEqual(page.next_page_number(), 3)
+            self.assertEqual(page_window(page), [1, 2, 3])
+        with self.assertNumQueries(1):
+            page = HasNextPaginator(self.groups, 2).get_page(3)
+            self.assertEqual(len(page), 1)
+            self.assertFalse(page.has_next())
+            self.assertEqual(page.end_index(), 5)
+
+    def test_page_past_end_shows_last(self):
+        paginator = HasNextPaginator(self.groups, 2)
+        self.assertEqual(paginator.get_page(10).number, 3)
+        self.assertEqual(paginator.get_page('x').number, 1)
+
+    def test_scoped_versions(self):
+        """Сброс одной ленты не трогает версии других."""
+        first, second = versions('group:1'), versions('group:2')
+        invalidate_counts('group:1')
+        self.assertNotEqual(versions('group:1'), first)
+        self.assertEqual(versions('group:2'), second)
+
+    def test_recent_page_falls_back_to_whole_feed(self):
+        """Страница, которой не хватает свежих постов, берется целиком."""
+        user = User.objects.create_user(username='author')
+        old = Post.objects.create(text='Старый', author=user)
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=365)
+        )
+        Post.objects.create(text='Новый', author=user)
+        paginator = HasNextPaginator(
+            Post.objects.all(), 1, recent_field='pub_date'
+        )
+        self.assertEqual(paginator.page(1)[0].text, 'Новый')
+        self.assertEqual(paginator.page(2)[0].text, 'Старый')
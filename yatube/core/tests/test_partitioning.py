@@ -0,0 +1,134 @@
+from datetime import datetime
+from unittest import skipIf, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, NotSupportedError, connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.paginator import HasNextPaginator
+from core.partitioning import (
+    PartitionByMonth, add_months, month_start, partition_month,
+    partition_name, partitions
+)
+from posts.models import Comment, Post, User
+
+
+class PartitioningTest(SimpleTestCase):
+    """Проверка помесячного именования секций."""
+
+    def test_months(self):
+        month = month_start(
+            timezone.make_aware(datetime(2026, 12, 31, 23, 30))
+        )
+        self.assertEqual(month, datetime(2026, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(add_months(month, 1).month, 1)
+        self.assertEqual(add_months(month, -12).year, 2025)
+        name = partition_name('posts_post', month)
+        self.assertEqual(name, 'posts_post_y2026m12')
+        self.assertEqual(partition_month(name), month)
+        self.assertIsNone(partition_month('posts_post_default'))
+
+    @skipIf(connection.vendor == 'postgresql', 'Команда работает')
+    def test_command_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command('manage_partitions')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Только для PostgreSQL')
+class PartitionByMonthTest(TransactionTestCase):
+    """Пересборка секционированной таблицы на PostgreSQL."""
+
+    def setUp(self):
+        self.state = MigrationLoader(connection).project_state()
+        self.operation = PartitionByMonth('post', 'pub_date')
+        self.user = User.objects.create_user(username='author')
+        self.old = month_start(timezone.now()).replace(year=2020)
+        self.post = Post.objects.create(text='Старый', author=self.user)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.old)
+        Comment.objects.create(text='Ответ', author=self.user, post=self.post)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE VIEW posts_post_texts AS SELECT id, text "
+                "FROM posts_post WHERE text LIKE '%%ый'"
+            )
+        self.addCleanup(self.execute, 'DROP VIEW posts_post_texts')
+
+    def execute(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall() if cursor.description else None
+
+    def rebuild(self, partitioned):
+        method = (
+            self.operation.database_forwards if partitioned
+            else self.operation.database_backwards
+        )
+        with connection.schema_editor() as editor:
+            method('posts', editor, self.state, self.state)
+
+    def test_round_trip_keeps_rows_and_dependents(self):
+        self.rebuild(partitioned=False)
+        with connection.cursor() as cursor:
+            self.assertEqual(partitions(cursor, 'posts_post'), [])
+        self.rebuild(partitioned=True)
+
+        with connection.cursor() as cursor:
+            names = partitions(cursor, 'posts_post')
+        self.assertIn(partition_name('posts_post', self.old), names)
+        self.assertEqual(
+            self.execute('SELECT tableoid::regclass::text FROM posts_post'),
+            [(partition_name('posts_post', self.old), )],
+        )
+        self.assertEqual(
+            self.execute('SELECT text FROM posts_post_texts'), [('Старый', )]
+        )
+        self.assertEqual(self.post.comments.count(), 1)
+        post = Post.objects.create(text='Новый', author=self.user)
+        self.assertGreater(post.pk, self.post.pk)
+
+    def test_foreign_key_stops_partitioning(self):
+        self.rebuild(partitioned=False)
+        self.execute(
+            'ALTER TABLE posts_comment ADD CONSTRAINT comment_post_fk '
+            'FOREIGN KEY (post_id) REFERENCES posts_post (id)'
+        )
+        with self.assertRaises(NotSupportedError):
+            self.rebuild(partitioned=True)
+        self.execute(
+            'ALTER TABLE posts_comment DROP CONSTRAINT comment_post_fk'
+        )
+        self.rebuild(partitioned=True)
+
+    def test_references_are_checked(self):
+        with self.assertRaises(IntegrityError):
+            Comment.objects.create(
+                text='Ответ', author=self.user, post_id=self.post.pk + 100
+            )
+        with self.assertRaises(IntegrityError):
+            self.execute(f'DELETE FROM posts_post WHERE id = {self.post.pk}')
+        # Смена месяца переносит строку в другую секцию, а не удаляет.
+        Post.objects.filter(pk=self.post.pk).update(pub_date=timezone.now())
+        self.post.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_feed_reads_recent_partitions(self):
+        Post.objects.create(text='Новый', author=self.user)
+        Post.objects.create(text='Новейший', author=self.user)
+        paginator = HasNextPaginator(
+            Post.objects.all(), 1, recent_field='pub_date'
+        )
+        # Свежих постов на страницу хватает: вся лента не читается.
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                [post.text for post in paginator.page(1)], ['Новейший']
+            )
+        sql, params = Post.objects.filter(
+            pub_date__gte=add_months(timezone.now(), -1)
+        ).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = '\n'.join(line for line, in cursor.fetchall())
+        self.assertIn(partition_name('posts_post', timezone.now()), plan)
+        self.assertNotIn(partition_name('posts_post', self.old), plan)
@@ -0,0 +1,67 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from core import metrics
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Проверка пула соединений."""
+
+    def setUp(self):
+        self.opened = []
+        self.pool = ConnectionPool(
+            alias='test',
+            is_healthy=lambda connection, idle: not connection.closed,
+            max_size=2,
+            timeout=0.01,
+        )
+
+    def _connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def test_released_connection_is_reused(self):
+        """Возвращенное соединение выдается повторно."""
+        connection = self.pool.acquire(self._connect)
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(self._connect), connection)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_unhealthy_connection_is_replaced(self):
+        """Закрытое соединение не выдается и заменяется новым."""
+        connection = self.pool.acquire(self._connect)
+        self.pool.release(connection)
+        connection.closed = True
+        self.assertIsNot(self.pool.acquire(self._connect), connection)
+        self.assertEqual(self.pool.size, 1)
+
+    def test_pool_size_is_capped(self):
+        """Сверх max_size соединения не открываются."""
+        self.pool.acquire(self._connect)
+        self.pool.acquire(self._connect)
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(self._connect)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_waiting_for_connection(self):
+        """Запрос ждет освобождения соединения другим потоком."""
+        self.pool.timeout = 5
+        first = self.pool.acquire(self._connect)
+        self.pool.acquire(self._connect)
+        threading.Timer(0.05, self.pool.release, (first, )).start()
+        self.assertIs(self.pool.acquire(self._connect), first)
+        self.assertIn(
+            'db_pool_wait_seconds_count{alias="test"}', metrics.render()
+        )
+        self.assertIn('db_pool_size{alias="test"} 2', metrics.render())
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import metrics
+from core.ratelimit import _take, _take_all, rate_limit
+
+
+@rate_limit('test')
+def view(request):
+    return HttpResponse()
+
+
+@override_settings(RATE_LIMITS={'test': {'ip': (2, 60)}})
+class RateLimitTest(SimpleTestCase):
+    """Проверка ограничения частоты запросов."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method='post', ip='10.0.0.1'):
+        request = getattr(self.factory, method)('/', REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        return view(request)
+
+    def test_bucket_is_drained(self):
+        """Сверх размера корзины отдается 429 с Retry-After."""
+        for _ in range(2):
+            self.assertEqual(self.request().status_code, 200)
+        response = self.request()
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 60)
+        self.assertIn(
+            'ratelimit_throttled_total{scope="test"}', metrics.render()
+        )
+
+    def test_buckets_are_separate(self):
+        for _ in range(3):
+            self.request()
+        self.assertEqual(self.request(ip='10.0.0.2').status_code, 200)
+        self.assertEqual(self.request(method='get').status_code, 200)
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_ip_from_trusted_header(self):
+        """За прокси корзина берется по адресу, который он передал."""
+        for ip in ('10.0.0.1', '10.0.0.2'):
+            request = self.factory.post(
+                '/', REMOTE_ADDR='127.0.0.1',
+                HTTP_X_FORWARDED_FOR=f'1.1.1.1, {ip}',
+            )
+            request.user = AnonymousUser()
+            for _ in range(2):
+                self.assertEqual(view(request).status_code, 200)
+
+    def test_rejected_request_keeps_other_tokens(self):
+        """Отказ по корзине пользователя не тратит жетон IP-адреса."""
+        limits = {'ip': (2, 60), 'user': (1, 60)}
+        identities = {'ip': '10.0.0.1', 'user': 1}
+        self.assertEqual(_take_all('test', limits, identities), 0)
+        for _ in range(3):
+            self.assertGreater(_take_all('test', limits, identities), 0)
+        self.assertEqual(self.request().status_code, 200)
+
+    def test_bucket_refills_continuously(self):
+        """Жетоны возвращаются по одному, без двойного запаса на стыке."""
+        with mock.patch('core.ratelimit.time.time') as clock:
+            clock.return_value = 1000.0
+            self.assertEqual(_take('bucket', 2, 60), 0)
+            self.assertEqual(_take('bucket', 2, 60), 0)
+            self.assertEqual(_take('bucket', 2, 60), 30)
+            clock.return_value = 1029.5
+            self.assertEqual(_take('bucket', 2, 60), 1)
+            clock.return_value = 1030.0
+            self.assertEqual(_take('bucket', 2, 60), 0)
+            self.assertGreater(_take('bucket', 2, 60), 0)
+            clock.return_value = 1060.0
+            self.assertEqual(_take('bucket', 2, 60), 0)
+            self.assertGreater(_take('bucket', 2, 60), 0)
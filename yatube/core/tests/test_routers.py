@@ -0,0 +1,69 @@
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import ReplicaRoutingMiddleware
+from core.routers import ReplicaRouter
+from posts.models import Follow, Post, User
+
+
+@override_settings(REPLICA_DATABASES=['replica_1'])
+class ReplicaRoutingTest(TestCase):
+    """Проверка распределения запросов между основной базой и репликой."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.used_databases = []
+
+    def _view(self, request):
+        self.used_databases.append(self.router.db_for_read(Post))
+        if request.method == 'POST':
+            return HttpResponseRedirect('/')
+        return HttpResponse()
+
+    def _follow_view(self, request):
+        author, _ = User.objects.get_or_create(username='author')
+        user, _ = User.objects.get_or_create(username='reader')
+        Follow.objects.get_or_create(user=user, author=author)
+        self.used_databases.append(self.router.db_for_read(Post))
+        return HttpResponseRedirect('/')
+
+    def _request(self, method, session, view=None):
+        request = getattr(self.factory, method)('/')
+        request.session = session
+        return ReplicaRoutingMiddleware(view or self._view)(request)
+
+    def test_safe_requests_read_from_replica(self):
+        """GET читает с реплики, вне запроса чтение идет в default."""
+        request = self.factory.get('/')
+        SessionMiddleware().process_request(request)
+        self._request('get', request.session)
+        self.assertEqual(self.used_databases, ['replica_1'])
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_write_pins_session_to_primary(self):
+        """После записи чтение в той же сессии идет с основной базы."""
+        request = self.factory.get('/')
+        SessionMiddleware().process_request(request)
+        self._request('post', request.session)
+        self._request('get', request.session)
+        self.assertEqual(self.used_databases, ['default', 'default'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        """По истечении окна чтение возвращается на реплику."""
+        request = self.factory.get('/')
+        SessionMiddleware().process_request(request)
+        self._request('post', request.session)
+        self._request('get', request.session)
+        self.assertEqual(self.used_databases, ['default', 'replica_1'])
+
+    def test_write_on_get_pins_session_to_primary(self):
+        """Подписка через GET тоже закрепляет сессию за основной базой."""
+        request = self.factory.get('/')
+        SessionMiddleware().process_request(request)
+        self._request('get', request.session, self._follow_view)
+        self._request('get', request.session)
+        self.assertEqual(self.used_databases, ['default', 'default'])
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.checks import check_sendfile_backend
+from core.sendfile import send_file
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, SENDFILE_BACKEND='')
+class SendFileTest(SimpleTestCase):
+    """Проверка отдачи файлов через прокси и с поддержкой Range."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(f'{TEMP_MEDIA_ROOT}/файл.txt', 'wb') as target:
+            target.write(b'0123456789')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def send(self, name='файл.txt', **headers):
+        request = RequestFactory().get('/', **headers)
+        return send_file(request, 'media', name, as_attachment=True)
+
+    def body(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_whole_file(self):
+        response = self.send()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn("filename*=utf-8''", response['Content-Disposition'])
+        self.assertEqual(self.body(response), b'0123456789')
+
+    def test_byte_ranges(self):
+        for header, content, content_range in (
+            ('bytes=2-4', b'234', 'bytes 2-4/10'),
+            ('bytes=7-', b'789', 'bytes 7-9/10'),
+            ('bytes=-2', b'89', 'bytes 8-9/10'),
+            ('bytes=5-100', b'56789', 'bytes 5-9/10'),
+        ):
+            with self.subTest(header=header):
+                response = self.send(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(
+                    response['Content-Length'], str(len(content))
+                )
+                self.assertEqual(self.body(response), content)
+
+    def test_unsatisfiable_and_unsupported_ranges(self):
+        response = self.send(HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+        # Несколько диапазонов не поддерживаются: отдается весь файл.
+        response = self.send(HTTP_RANGE='bytes=0-1,4-5')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_proxy_backends(self):
+        with self.settings(SENDFILE_BACKEND='nginx'):
+            response = self.send()
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected/media/%D1%84%D0%B0%D0%B9%D0%BB.txt',
+        )
+        self.assertEqual(response.content, b'')
+        with self.settings(SENDFILE_BACKEND='apache'):
+            response = self.send()
+        self.assertEqual(
+            unquote(response['X-Sendfile']), f'{TEMP_MEDIA_ROOT}/файл.txt'
+        )
+
+    def test_paths_outside_root_are_not_found(self):
+        for name in ('../settings.py', 'missing.txt'):
+            with self.subTest(name=name), self.assertRaises(Http404):
+                self.send(name)
+
+    def test_deploy_check_requires_proxy(self):
+        with self.settings(DEBUG=False, SENDFILE_BACKEND=''):
+            self.assertEqual(
+                [error.id for error in check_sendfile_backend(None)],
+                ['core.E001'],
+            )
+        with self.settings(DEBUG=False, SENDFILE_BACKEND='nginx'):
+            self.assertEqual(check_sendfile_backend(None), [])
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.views import serve_static
+
+STYLE = 'body { color: black; }\n' * 50
+
+
+class PrecompressedStaticTest(SimpleTestCase):
+    """Проверка сборки и раздачи сжатой статики."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as css:
+            css.write(STYLE)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source)
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+
+    def test_collectstatic_writes_compressed_copies(self):
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        for name in ('css/site.css', self.hashed):
+            with self.subTest(name=name):
+                self.assertTrue(staticfiles_storage.exists(f'{name}.gz'))
+
+    def test_serves_gzip_with_immutable_cache(self):
+        """Хэшированный файл отдается сжатым и кэшируется навсегда."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        response = serve_static(request, self.hashed)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_serves_original_without_accept_encoding(self):
+        response = serve_static(self.factory.get('/'), 'css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(), STYLE
+        )
@@ -0,0 +1,105 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task('tests.record')
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@tasks.task('tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('сбой')
+
+
+@override_settings(TASK_RETRY_DELAY=10)
+class TaskQueueTest(TestCase):
+    """Проверка очереди фоновых задач."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_claims_by_priority_in_batches(self):
+        tasks.enqueue('tests.record', 'низкий')
+        tasks.enqueue('tests.record', 'высокий', priority=5)
+        tasks.enqueue('tests.record', 'позже', run_at=(
+            timezone.now() + timedelta(hours=1)
+        ))
+        tasks.enqueue('tests.record', 'средний', suffix='!', priority=1)
+
+        self.assertEqual(tasks.work('test', batch_size=2), 2)
+        self.assertEqual(calls, ['высокий', 'средний!'])
+        self.assertEqual(tasks.work('test', batch_size=2), 1)
+        self.assertEqual(tasks.work('test', batch_size=2), 0)
+        self.assertEqual(Task.objects.get().payload, (
+            '{"args": ["\\u043f\\u043e\\u0437\\u0436\\u0435"], "kwargs": {}}'
+        ))
+
+    def test_failed_task_is_retried_with_backoff(self):
+        job = tasks.enqueue('tests.fail')
+        self.assertEqual(job.max_attempts, 2)
+        tasks.work('test', batch_size=1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('ValueError', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+        Task.objects.update(run_at=timezone.now())
+        tasks.work('test', batch_size=1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+
+    def test_stale_tasks_are_requeued(self):
+        job = tasks.enqueue('tests.record', 1)
+        Task.objects.update(
+            status=Task.RUNNING,
+            locked_at=timezone.now() - timedelta(days=1),
+        )
+        self.assertEqual(tasks.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.QUEUED)
+
+    def test_requeued_task_is_not_run_twice(self):
+        """Задачу, отданную другому обработчику, прежний не выполняет."""
+        tasks.enqueue('tests.record', 1)
+        tasks.enqueue('tests.record', 2)
+        first, second = tasks.claim('first', 2)
+        Task.objects.filter(pk=second.pk).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(tasks.work('second', 10), 1)
+
+        self.assertTrue(tasks.start(first))
+        tasks.execute(first)
+        self.assertFalse(tasks.start(second))
+        self.assertEqual(calls, ['2', '1'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_result_is_kept_for_new_owner(self):
+        tasks.enqueue('tests.record', 1)
+        job, = tasks.claim('first', 1)
+        self.assertTrue(tasks.start(job))
+        Task.objects.update(locked_by='second')
+        tasks.execute(job)
+        self.assertEqual(Task.objects.get().locked_by, 'second')
+
+    def test_worker_command_drains_queue(self):
+        for value in range(3):
+            tasks.enqueue('tests.record', value)
+        call_command(
+            'run_tasks', '--once', '--processes', '1', '--batch-size', '2',
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(sorted(calls), ['0', '1', '2'])
+        self.assertFalse(Task.objects.exists())
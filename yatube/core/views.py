@@ -1,4 +1,18 @@
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified
+)
 from django.shortcuts import render
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics
 
 
 def page_not_found(request, exception):
@@ -14,3 +28,49 @@ def csrf_failure(request, reason=''):
 def version_not_supported(request):
 
     return render(request, 'core/500.html', status=500)
+
+
+def export_metrics(request):
+    """Метрики процесса для сборщика, доступны только с INTERNAL_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def serve_static(request, path):
+    """Отдает статику, выбирая заранее сжатую копию по Accept-Encoding.
+
+    Файлы с хэшем в имени кэшируются браузером навсегда, остальные —
+    на STATIC_MAX_AGE секунд.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path, encoding = staticfiles_storage.encoded_path(
+            name, request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime, stat.st_size
+    ):
+        return HttpResponseNotModified()
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if staticfiles_storage.is_immutable(name):
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable'
+        )
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+    return response
@@ -1,6 +1,26 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
-from .models import Post, Group
+from . import deletion
+from .models import DeletionJob, Group, Post, User
+
+
+class ScheduledDeletionMixin:
+    """Объект скрывается сразу, а связанные записи удаляет фоновая задача.
+
+    Страница подтверждения не собирает каскад: для больших аккаунтов и
+    групп это само по себе заняло бы минуты.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        deletion.schedule(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            deletion.schedule(obj)
 
 
 @admin.register(Post)
@@ -21,7 +41,7 @@ class PostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Group)
-class GroupAdmin(admin.ModelAdmin):
+class GroupAdmin(ScheduledDeletionMixin, admin.ModelAdmin):
     """Параметры отображения модели Group."""
 
     list_display = (
@@ -31,3 +51,28 @@ class GroupAdmin(admin.ModelAdmin):
     )
     empty_value_display = '-пусто-'
     search_fields = ('description', )
+    list_filter = ('is_active', )
+
+
+class ScheduledDeletionUserAdmin(ScheduledDeletionMixin, UserAdmin):
+    """Пользователь удаляется фоновой задачей, а не одной транзакцией."""
+
+
+admin.site.unregister(User)
+admin.site.register(User, ScheduledDeletionUserAdmin)
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Ход фонового удаления."""
+
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'step',
+        'processed',
+        'created',
+        'finished',
+    )
+    list_filter = ('kind', 'finished')
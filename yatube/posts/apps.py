@@ -1,7 +1,80 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_save
+)
+from PIL import Image
 
 
 class PostsConfig(AppConfig):
     """Создание конфигурации приложения posts."""
 
     name = 'posts'
+
+    def ready(self):
+        from . import signals
+
+        Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+
+        post_save.connect(
+            signals.log_new_post, sender=self.get_model('Post')
+        )
+        post_save.connect(
+            signals.count_comment, sender=self.get_model('Comment')
+        )
+        pre_save.connect(
+            signals.remember_post_state, sender=self.get_model('Post')
+        )
+        post_save.connect(
+            signals.update_group_stats, sender=self.get_model('Post')
+        )
+        post_delete.connect(
+            signals.remove_from_group_stats, sender=self.get_model('Post')
+        )
+        post_save.connect(
+            signals.create_group_stats, sender=self.get_model('Group')
+        )
+        post_delete.connect(
+            signals.release_post_image, sender=self.get_model('Post')
+        )
+        post_save.connect(
+            signals.invalidate_post_counts, sender=self.get_model('Post')
+        )
+        post_delete.connect(
+            signals.invalidate_post_counts, sender=self.get_model('Post')
+        )
+        post_save.connect(
+            signals.invalidate_follow_counts, sender=self.get_model('Follow')
+        )
+        post_delete.connect(
+            signals.invalidate_follow_counts, sender=self.get_model('Follow')
+        )
+        post_save.connect(
+            signals.invalidate_follows, sender=self.get_model('Follow')
+        )
+        post_delete.connect(
+            signals.invalidate_follows, sender=self.get_model('Follow')
+        )
+        for model in (
+            self.get_model('Post'),
+            self.get_model('Comment'),
+            self.get_model('Follow'),
+            get_user_model(),
+        ):
+            post_save.connect(signals.invalidate_author_cards, sender=model)
+            post_delete.connect(signals.invalidate_author_cards, sender=model)
+        post_save.connect(
+            signals.forget_post_syndication, sender=self.get_model('Post')
+        )
+        post_delete.connect(
+            signals.forget_post_syndication, sender=self.get_model('Post')
+        )
+        post_save.connect(
+            signals.forget_user_syndication, sender=get_user_model()
+        )
+        for model in (self.get_model('Post'), self.get_model('Comment')):
+            post_save.connect(signals.discard_author_export, sender=model)
+            post_delete.connect(signals.discard_author_export, sender=model)
+        if settings.CACHE_WARM_ON_MIGRATE:
+            post_migrate.connect(signals.warm_cache_after_migrate, sender=self)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Comment, Follow, Post, User
+
+
+class AuthorCard:
+    """Сведения об авторе, которые показываются рядом с его записями."""
+
+    def __init__(self, user_id, username, display_name, posts_count=0,
+                 followers_count=0, following_count=0, last_activity=None):
+        self.id = user_id
+        self.username = username
+        self.display_name = display_name
+        self.posts_count = posts_count
+        self.followers_count = followers_count
+        self.following_count = following_count
+        self.last_activity = last_activity
+
+
+def _key(user_id):
+    return f'author_card:{user_id}'
+
+
+def _counts(queryset, field):
+    return dict(
+        queryset.order_by().values(field).annotate(
+            count=Count('pk')
+        ).values_list(field, 'count')
+    )
+
+
+def _latest(queryset, user_ids):
+    return dict(
+        queryset.filter(author_id__in=user_ids).order_by().values(
+            'author_id'
+        ).annotate(latest=Max('pub_date')).values_list('author_id', 'latest')
+    )
+
+
+def _build(user_ids):
+    """Карточки пользователей user_ids, по запросу на каждый счетчик."""
+    posts = _counts(Post.objects.filter(author_id__in=user_ids), 'author_id')
+    followers = _counts(
+        Follow.objects.filter(author_id__in=user_ids), 'author_id'
+    )
+    following = _counts(Follow.objects.filter(user_id__in=user_ids), 'user_id')
+    last_post = _latest(Post.objects, user_ids)
+    last_comment = _latest(Comment.objects, user_ids)
+    cards = {}
+    for user in User.objects.filter(pk__in=user_ids).only(
+        'username', 'first_name', 'last_name'
+    ):
+        activity = [
+            date
+            for date in (last_post.get(user.pk), last_comment.get(user.pk))
+            if date is not None
+        ]
+        cards[user.pk] = AuthorCard(
+            user.pk,
+            user.username,
+            user.get_full_name() or user.username,
+            posts_count=posts.get(user.pk, 0),
+            followers_count=followers.get(user.pk, 0),
+            following_count=following.get(user.pk, 0),
+            last_activity=max(activity, default=None),
+        )
+    return cards
+
+
+def cards(user_ids):
+    """Карточки {id: AuthorCard}; в базу идут только те, которых нет в кэше.
+
+    Карточка хранится AUTHOR_CARD_CACHE_TIME секунд. Несуществующие
+    пользователи в результат не попадают.
+    """
+    user_ids = set(user_ids)
+    cached = cache.get_many([_key(user_id) for user_id in user_ids])
+    found = {card.id: card for card in cached.values()}
+    missing = user_ids.difference(found)
+    if missing:
+        built = _build(missing)
+        cache.set_many(
+            {_key(user_id): card for user_id, card in built.items()},
+            settings.AUTHOR_CARD_CACHE_TIME,
+        )
+        found.update(built)
+    return found
+
+
+def card(user_id):
+    return cards([user_id]).get(user_id)
+
+
+def attach(objects):
+    """Проставляет author_card объектам с полем author, например постам
+    и комментариям, одним обращением к кэшу."""
+    objects = list(objects)
+    found = cards(obj.author_id for obj in objects)
+    for obj in objects:
+        obj.author_card = found.get(obj.author_id)
+    return objects
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
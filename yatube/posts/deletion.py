@@ -0,0 +1,217 @@
+import os
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core import auth, tasks
+from core.paginator import invalidate_counts
+from . import authors, follows, group_stats, images, syndication
+from .export import discard_export, export_path
+from .models import (
+    ActivityCounter, Comment, DeletionJob, Follow, Group, GroupStats,
+    Notification, Post, PostEvent, Recommendation, User
+)
+
+MODELS = {
+    DeletionJob.USER: User,
+    DeletionJob.GROUP: Group,
+}
+
+
+def schedule(obj):
+    """Сразу скрывает пользователя или группу и ставит очистку в очередь.
+
+    Посты и профиль пользователя скрывает сама незавершенная задача, см.
+    DeletionJob.pending; is_active снимается, только чтобы он больше не
+    мог войти. Группа пропадает из списков; связанные записи удаляет
+    run().
+    """
+    kind = DeletionJob.USER if isinstance(obj, User) else DeletionJob.GROUP
+    job, created = DeletionJob.objects.get_or_create(
+        kind=kind, object_id=obj.pk, finished=None
+    )
+    MODELS[kind].objects.filter(pk=obj.pk).update(is_active=False)
+    if kind == DeletionJob.USER:
+        auth.invalidate(obj.pk)
+    invalidate_counts()
+    syndication.reset()
+    if created:
+        tasks.enqueue('posts.run_deletion', job.pk)
+    return job
+
+
+def _rows(queryset, size, *fields):
+    return list(queryset.order_by('pk').values_list('pk', *fields)[:size])
+
+
+def _raw_delete(model, rows):
+    """Удаляет пачку одним DELETE, без сигналов на каждую запись.
+
+    Зависимые записи к этому моменту уже удалены предыдущими шагами,
+    а кэши шаг сбрасывает сам, один раз на пачку.
+    """
+    queryset = model.objects.filter(pk__in=[row[0] for row in rows])
+    queryset._raw_delete(queryset.db)
+    return len(rows)
+
+
+def _delete(queryset, size):
+    return _raw_delete(queryset.model, _rows(queryset, size))
+
+
+def _delete_comments(queryset, size):
+    rows = _rows(queryset, size, 'author_id')
+    author_ids = {author_id for _, author_id in rows}
+    authors.invalidate(*author_ids)
+    for author_id in author_ids:
+        discard_export(author_id)
+    return _raw_delete(Comment, rows)
+
+
+def _delete_follows(queryset, size):
+    rows = _rows(queryset, size, 'user_id', 'author_id')
+    user_ids = {user_id for _, user_id, _ in rows}
+    invalidate_counts(*(f'follow:{user_id}' for user_id in user_ids))
+    follows.invalidate(*user_ids)
+    authors.invalidate(*user_ids, *(author_id for _, _, author_id in rows))
+    return _raw_delete(Follow, rows)
+
+
+def _delete_posts(queryset, size):
+    """Удаляет пачку постов и поправляет сводки их групп.
+
+    Ленты и их счетчики не сбрасываются: посты удаляемого автора скрыты
+    из них еще в schedule().
+    """
+    rows = _rows(queryset, size, 'group_id', 'is_published', 'pub_date',
+                 'image')
+    GroupStats.objects.filter(
+        latest_post_id__in=[row[0] for row in rows]
+    ).update(latest_post=None)
+    count = _raw_delete(Post, rows)
+    removed = {}
+    for pk, group_id, is_published, pub_date, _ in rows:
+        if group_id and is_published:
+            removed.setdefault(group_id, []).append((pk, pub_date))
+    for group_id, posts in removed.items():
+        group_stats.posts_removed(group_id, posts)
+    for name in {row[4] for row in rows}:
+        images.release(name)
+    return count
+
+
+def _unlink_group(queryset, size):
+    ids = list(queryset.values_list('pk', flat=True)[:size])
+    if ids:
+        Post.objects.filter(pk__in=ids).update(group=None)
+        invalidate_counts()
+    return len(ids)
+
+
+# Шаги очистки: (название, выборка по id объекта, действие над пачкой).
+# Пост удаляется последним, когда его комментарии и события уже удалены,
+# поэтому каждая пачка — короткая транзакция без длинного каскада.
+STEPS = {
+    DeletionJob.USER: (
+        (
+            'comments',
+            lambda pk: Comment.objects.filter(author_id=pk),
+            _delete_comments,
+        ),
+        (
+            'post_comments',
+            lambda pk: Comment.objects.filter(post__author_id=pk),
+            _delete_comments,
+        ),
+        (
+            'follows',
+            lambda pk: Follow.objects.filter(Q(user_id=pk) | Q(author_id=pk)),
+            _delete_follows,
+        ),
+        (
+            'recommendations',
+            lambda pk: Recommendation.objects.filter(
+                Q(user_id=pk) | Q(author_id=pk)
+            ),
+            _delete,
+        ),
+        (
+            'notifications',
+            lambda pk: Notification.objects.filter(
+                Q(recipient_id=pk) | Q(post__author_id=pk)
+            ),
+            _delete,
+        ),
+        (
+            'events',
+            lambda pk: PostEvent.objects.filter(author_id=pk),
+            _delete,
+        ),
+        (
+            'posts',
+            lambda pk: Post.objects.filter(author_id=pk),
+            _delete_posts,
+        ),
+    ),
+    DeletionJob.GROUP: (
+        (
+            'posts',
+            lambda pk: Post.objects.filter(group_id=pk),
+            _unlink_group,
+        ),
+        (
+            'counters',
+            lambda pk: ActivityCounter.objects.filter(
+                kind=ActivityCounter.GROUP_POSTS, object_id=pk
+            ),
+            _delete,
+        ),
+    ),
+}
+
+
+def run(job, chunk_size):
+    """Выполняет задачу целиком пачками по chunk_size записей."""
+    while not step(job, chunk_size):
+        pass
+
+
+def step(job, chunk_size):
+    """Обрабатывает одну полную пачку, возвращает True, когда задача
+    выполнена.
+
+    Прогресс сохраняется после каждой пачки, поэтому прерванную задачу
+    можно просто запустить снова. Задача очереди posts.run_deletion
+    делает по одной пачке за запуск и не держит блокировку дольше
+    TASK_LOCK_TIMEOUT.
+    """
+    if job.finished is not None:
+        return True
+    steps = STEPS[job.kind]
+    names = [name for name, _, _ in steps]
+    start = names.index(job.step) if job.step in names else 0
+    for name, records, action in steps[start:]:
+        with transaction.atomic():
+            done = action(records(job.object_id), chunk_size)
+            job.step = name
+            job.processed += done
+            job.save(update_fields=('step', 'processed'))
+        if done == chunk_size:
+            return False
+    _finish(job)
+    return True
+
+
+def _finish(job):
+    obj = MODELS[job.kind].objects.filter(pk=job.object_id).first()
+    with transaction.atomic():
+        if obj is not None:
+            obj.delete()
+        job.step = ''
+        job.finished = timezone.now()
+        job.save(update_fields=('step', 'finished'))
+    if job.kind == DeletionJob.USER and obj is not None:
+        path = export_path(obj)
+        if os.path.exists(path):
+            os.remove(path)
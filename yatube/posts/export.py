@@ -0,0 +1,173 @@
+import json
+import os
+import time
+import zipfile
+
+from django.conf import settings
+
+from core.models import Task
+from core.tasks import enqueue
+from .models import Comment, Post
+
+# Размер куска, отдаваемого клиенту, и блока чтения картинок.
+EXPORT_BLOCK_SIZE = 64 * 1024
+
+# Сколько строк читается из базы за один запрос.
+EXPORT_CHUNK_SIZE = 500
+
+# Поля постов и комментариев, которые попадают в архив.
+EXPORTED_FIELDS = {'text', 'pub_date', 'group', 'image', 'post'}
+
+
+class _ZipBuffer:
+    """Файл без seek, из которого zipfile пишет архив по кускам."""
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self, min_size=0):
+        if self._size < min_size:
+            return b''
+        data = b''.join(self._chunks)
+        self._chunks, self._size = [], 0
+        return data
+
+
+def _entry(name, compress_type=zipfile.ZIP_DEFLATED):
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def _post_record(post):
+    return {
+        'id': post.id,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'group': post.group.slug if post.group else None,
+        'image': post.image.name or None,
+    }
+
+
+def _comment_record(comment):
+    return {
+        'id': comment.id,
+        'post': comment.post_id,
+        'text': comment.text,
+        'pub_date': comment.pub_date.isoformat(),
+    }
+
+
+def iter_export(user):
+    """Отдает zip-архив с данными пользователя кусками.
+
+    Посты и комментарии читаются через iterator(), картинки — блоками,
+    поэтому память не зависит от размера аккаунта.
+    """
+    return (chunk for chunk in _iter_archive(user) if chunk)
+
+
+def _iter_archive(user):
+    buffer = _ZipBuffer()
+    sources = (
+        (
+            'posts.jsonl',
+            Post.objects.filter(author=user).select_related('group'),
+            _post_record,
+        ),
+        (
+            'comments.jsonl',
+            Comment.objects.filter(author=user),
+            _comment_record,
+        ),
+    )
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, queryset, serialize in sources:
+            with archive.open(_entry(name), 'w', force_zip64=True) as entry:
+                for obj in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                    entry.write(
+                        json.dumps(serialize(obj), ensure_ascii=False)
+                        .encode() + b'\n'
+                    )
+                    yield buffer.pop(EXPORT_BLOCK_SIZE)
+
+        # Одинаковые загрузки разных постов хранятся одним файлом.
+        images = Post.objects.filter(author=user).exclude(
+            image=''
+        ).order_by('image').values_list('image', flat=True).distinct()
+        storage = Post.image.field.storage
+        for image in images.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            if not storage.exists(image):
+                continue
+            info = _entry(f'images/{image}', zipfile.ZIP_STORED)
+            with storage.open(image) as source, archive.open(
+                info, 'w', force_zip64=True
+            ) as entry:
+                for block in source.chunks(EXPORT_BLOCK_SIZE):
+                    entry.write(block)
+                    yield buffer.pop(EXPORT_BLOCK_SIZE)
+    yield buffer.pop()
+
+
+def _path(user_id):
+    return os.path.join(settings.EXPORT_ROOT, f'{user_id}.zip')
+
+
+def export_path(user):
+    """Путь к заранее собранному архиву пользователя."""
+    return _path(user.pk)
+
+
+def schedule_export(user):
+    """Ставит сборку архива пользователя в очередь, если ее там нет."""
+    payload = json.dumps({'args': [user.pk], 'kwargs': {}})
+    if not Task.objects.filter(
+        name='posts.write_export',
+        payload=payload,
+        status__in=(Task.QUEUED, Task.RUNNING),
+    ).exists():
+        enqueue('posts.write_export', user.pk)
+
+
+def write_export(user):
+    """Собирает архив пользователя в EXPORT_ROOT для больших аккаунтов.
+
+    Если данные изменились во время сборки, архив не сохраняется и
+    возвращается None.
+    """
+    path = export_path(user)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as archive:
+        for chunk in iter_export(user):
+            archive.write(chunk)
+    try:
+        os.replace(temporary, path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def discard_export(user_id):
+    """Удаляет собранный архив пользователя, данные которого изменились.
+
+    Вместе с ним удаляется и недособранный архив, так что идущая сборка
+    не подменит свежие данные устаревшими. Пока архива нет, страница
+    выгрузки отдает данные потоком. В базу не обращается, поэтому
+    дешев и для каждого сохранения.
+    """
+    path = _path(user_id)
+    for name in (path, f'{path}.tmp'):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
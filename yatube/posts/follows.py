@@ -0,0 +1,50 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+
+def _key(user_id):
+    return f'follows:{user_id}'
+
+
+def followed_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id.
+
+    Загружается из базы одним запросом и хранится в кэше
+    FOLLOW_CACHE_TIME секунд; изменение подписок пользователя сбрасывает
+    его.
+    """
+    ids = cache.get(_key(user_id))
+    if ids is None:
+        ids = array('q', sorted(
+            Follow.objects.filter(user_id=user_id).values_list(
+                'author_id', flat=True
+            ).distinct()
+        ))
+        cache.set(_key(user_id), ids, settings.FOLLOW_CACHE_TIME)
+    return ids
+
+
+def is_following(user_id, author_id):
+    ids = followed_ids(user_id)
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def followed_among(user_id, author_ids):
+    """Те из author_ids, на которых подписан пользователь."""
+    ids = followed_ids(user_id)
+    found = set()
+    for author_id in author_ids:
+        index = bisect_left(ids, author_id)
+        if index < len(ids) and ids[index] == author_id:
+            found.add(author_id)
+    return found
+
+
+def invalidate(*user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
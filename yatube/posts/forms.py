@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 from .models import Comment, Post
@@ -47,3 +48,14 @@ class PostForm(forms.ModelForm):
                     'Чтобы сохранить пост, заполните это поле.'
                 )
             return text
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        decoded = getattr(image, 'image', None)
+        if decoded is not None:
+            width, height = decoded.size
+            if width * height > settings.MAX_IMAGE_PIXELS:
+                raise forms.ValidationError(
+                    'Слишком большое разрешение картинки.'
+                )
+        return image
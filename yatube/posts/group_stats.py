@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Group, GroupStats, Post
+
+# За сколько последних дней показывается активность группы.
+DAYS = 7
+
+
+def daily_counts(stats, today):
+    """Посты по дням, первым идет today."""
+    counts = [int(count) for count in stats.daily_posts.split(',')]
+    if stats.daily_date is None:
+        return [0] * DAYS
+    shift = (today - stats.daily_date).days
+    if shift > 0:
+        counts = [0] * shift + counts
+    return (counts + [0] * DAYS)[:DAYS]
+
+
+def week_posts(stats, today=None):
+    return sum(daily_counts(stats, today or timezone.localdate()))
+
+
+def _count_day(stats, pub_date, delta):
+    today = timezone.localdate()
+    counts = daily_counts(stats, today)
+    index = (today - timezone.localdate(pub_date)).days
+    if 0 <= index < DAYS:
+        counts[index] = max(counts[index] + delta, 0)
+    stats.daily_posts = ','.join(map(str, counts))
+    stats.daily_date = today
+
+
+def _update(group_id, change):
+    with transaction.atomic():
+        stats, _ = GroupStats.objects.select_for_update().get_or_create(
+            group_id=group_id
+        )
+        change(stats)
+        stats.save()
+
+
+def post_added(post):
+    """Учитывает опубликованный пост в сводке его группы."""
+    def change(stats):
+        stats.post_count += 1
+        if (stats.latest_pub_date is None
+                or post.pub_date >= stats.latest_pub_date):
+            stats.latest_post_id = post.pk
+            stats.latest_pub_date = post.pub_date
+        _count_day(stats, post.pub_date, 1)
+
+    if post.group_id:
+        _update(post.group_id, change)
+
+
+def post_removed(post, group_id):
+    """Убирает пост из сводки группы group_id."""
+    posts_removed(group_id, [(post.pk, post.pub_date)])
+
+
+def posts_removed(group_id, posts):
+    """Убирает из сводки группы group_id посты [(pk, pub_date), ...]."""
+    ids = [pk for pk, _ in posts]
+
+    def change(stats):
+        stats.post_count = max(stats.post_count - len(posts), 0)
+        for _, pub_date in posts:
+            _count_day(stats, pub_date, -1)
+        # При удалении поста ссылку на него уже обнулил SET_NULL.
+        if stats.latest_post_id is None or stats.latest_post_id in ids:
+            latest = Post.objects.filter(
+                group_id=group_id, is_published=True
+            ).exclude(pk__in=ids).order_by('-pub_date').values_list(
+                'pk', 'pub_date'
+            ).first()
+            stats.latest_post_id, stats.latest_pub_date = latest or (
+                None, None
+            )
+
+    if group_id:
+        _update(group_id, change)
+
+
+def rebuild(group_model=Group, stats_model=GroupStats, post_model=Post):
+    """Пересчитывает сводку всех групп по таблице постов.
+
+    Модели передаются для миграции, которая работает с историческими.
+    """
+    Group, GroupStats, Post = group_model, stats_model, post_model
+    today = timezone.localdate()
+    # Сортировка по умолчанию попала бы в GROUP BY.
+    posts = Post.objects.filter(
+        is_published=True, group__isnull=False
+    ).order_by()
+    totals = {
+        row['group_id']: row
+        for row in posts.values('group_id').annotate(
+            count=Count('id'), latest=Max('pub_date')
+        )
+    }
+    daily = {}
+    recent = posts.filter(
+        pub_date__date__gt=today - timedelta(days=DAYS)
+    ).annotate(day=TruncDate('pub_date')).values('group_id', 'day').annotate(
+        count=Count('id')
+    )
+    for row in recent:
+        counts = daily.setdefault(row['group_id'], [0] * DAYS)
+        counts[(today - row['day']).days] += row['count']
+
+    rows = []
+    for group_id in Group.objects.values_list('id', flat=True):
+        total = totals.get(group_id)
+        latest_post_id = total and posts.filter(
+            group_id=group_id, pub_date=total['latest']
+        ).values_list('pk', flat=True).first()
+        rows.append(GroupStats(
+            group_id=group_id,
+            post_count=total['count'] if total else 0,
+            latest_post_id=latest_post_id,
+            latest_pub_date=total and total['latest'],
+            daily_posts=','.join(
+                map(str, daily.get(group_id, [0] * DAYS))
+            ),
+            daily_date=today,
+        ))
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(rows)
+    return len(rows)
@@ -0,0 +1,252 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+import uuid
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core import tasks
+from core.paginator import invalidate_counts
+from . import authors, group_stats, trending
+from .export import discard_export
+from .models import Post, PostEvent
+
+logger = logging.getLogger(__name__)
+
+# Что показать автору, если загруженный файл не удалось обработать.
+IMAGE_ERROR = (
+    'Не удалось обработать картинку: файл поврежден или не является '
+    'изображением. Загрузите другой файл.'
+)
+
+# Ошибки разбора файла, после которых повторять обработку бессмысленно.
+BROKEN_IMAGE_ERRORS = (
+    OSError, SyntaxError, ValueError, Image.DecompressionBombError
+)
+
+# Размер заглушки: пропорции карточки поста 960x339.
+PLACEHOLDER_SIZE = (24, 8)
+
+
+def process_image(source, target, max_pixels):
+    """Декодирует картинку, поворачивает по EXIF и пересохраняет без
+    метаданных. Возвращает расширение.
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with Image.open(source) as image:
+        if image.format == 'GIF':
+            image.save(target, 'GIF', save_all=True, optimize=True)
+            return '.gif'
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            transparency = image.info.get('transparency')
+            image.info = {}
+            if transparency is not None:
+                image.info['transparency'] = transparency
+            image.save(target, 'PNG', optimize=True)
+            return '.png'
+        image.info = {}
+        image.convert('RGB').save(
+            target, 'JPEG', quality=85, optimize=True, progressive=True
+        )
+        return '.jpg'
+
+
+def placeholder(path):
+    """Размытая копия картинки для карточки в виде data URI.
+
+    Занимает меньше килобайта и показывается фоном, пока браузер не
+    загрузил миниатюру. Для битого файла — пустая строка.
+    """
+    width, height = PLACEHOLDER_SIZE
+    try:
+        with Image.open(path) as image:
+            image.draft('RGB', (width * 8, height * 8))
+            image = ImageOps.fit(
+                ImageOps.exif_transpose(image).convert('RGB'),
+                PLACEHOLDER_SIZE,
+                Image.BILINEAR,
+            )
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception('Не удалось сделать заглушку для %s', path)
+        return ''
+    content = io.BytesIO()
+    image.save(content, 'JPEG', quality=40)
+    encoded = base64.b64encode(content.getvalue()).decode()
+    return f'data:image/jpeg;base64,{encoded}'
+
+
+def _persist(upload, path):
+    """Сохраняет загрузку вне запроса: временный файл Django удалится.
+
+    Возвращает sha256 исходного файла.
+    """
+    digest = hashlib.sha256()
+    if hasattr(upload, 'temporary_file_path'):
+        try:
+            os.link(upload.temporary_file_path(), path)
+        except OSError:
+            pass
+        else:
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            return digest.hexdigest()
+    with open(path, 'wb') as target:
+        for chunk in upload.chunks():
+            digest.update(chunk)
+            target.write(chunk)
+    return digest.hexdigest()
+
+
+def _processed_key(digest):
+    return f'images:processed:{digest}'
+
+
+def release(name):
+    """Через MEDIA_RELEASE_DELAY удаляет файл картинки, если на него
+    больше не ссылаются посты.
+
+    Удаление отложено: одинаковая загрузка, сохраненная тем временем,
+    получает то же имя, и ссылка на него появится позже.
+    """
+    if name:
+        tasks.enqueue(
+            'posts.release_image',
+            name,
+            run_at=timezone.now() + timedelta(
+                seconds=settings.MEDIA_RELEASE_DELAY
+            ),
+        )
+
+
+def release_now(name):
+    """Удаляет файл без ссылок; недавно использованный откладывает."""
+    storage = Post.image.field.storage
+    if storage.release(
+        name, Post.objects.filter(image=name), settings.MEDIA_RELEASE_DELAY
+    ):
+        release(name)
+
+
+def schedule(post, upload):
+    """Отправляет загруженную картинку поста на обработку.
+
+    Новый пост сохраняется неопубликованным и публикуется, когда
+    картинка готова; у опубликованного поста картинка просто заменяется.
+    Загрузка сохраняется в IMAGE_PROCESSING_DIR, а обрабатывает ее задача
+    posts.process_image, поэтому перезапуск сервера ее не теряет.
+    Уже обработанный ранее файл повторно не перекодируется.
+    """
+    os.makedirs(settings.IMAGE_PROCESSING_DIR, exist_ok=True)
+    source = os.path.join(settings.IMAGE_PROCESSING_DIR, uuid.uuid4().hex)
+    digest = _persist(upload, source)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+
+    processed = cache.get(_processed_key(digest))
+    if processed and Post.image.field.storage.touch(processed):
+        _finish(post.pk, name, digest, source, f'{source}.out', processed)
+    elif settings.IMAGE_PROCESSING_INLINE:
+        process(post.pk, name, digest, source)
+    else:
+        tasks.enqueue('posts.process_image', post.pk, name, digest, source)
+
+
+def process(post_id, name, digest, source):
+    """Обрабатывает сохраненную загрузку и сохраняет ее в пост.
+
+    Если файл не читается как картинка, повтор не поможет: пост не
+    публикуется, а автор видит ошибку. Прочие ошибки пробрасываются,
+    и очередь задач повторит обработку; загрузка до тех пор хранится.
+    """
+    target = f'{source}.out'
+    if not os.path.exists(source):
+        # Задача уже отработала, либо загрузка потеряна.
+        Post.objects.filter(pk=post_id, is_published=False).update(
+            image_error=IMAGE_ERROR
+        )
+        return
+    try:
+        extension = process_image(source, target, settings.MAX_IMAGE_PIXELS)
+    except BROKEN_IMAGE_ERRORS:
+        logger.exception('Не удалось обработать картинку %s', post_id)
+        Post.objects.filter(pk=post_id).update(image_error=IMAGE_ERROR)
+        _remove(source, target)
+        return
+    _finish(post_id, name, digest, source, target, extension)
+
+
+def _remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _store(post, name, digest, target, result):
+    """Сохраняет обработанный файл, возвращает изменения полей поста."""
+    if result.startswith('.'):
+        with open(target, 'rb') as image:
+            post.image.save(f'{name}{result}', File(image), save=False)
+        cache.set(_processed_key(digest), post.image.name, None)
+        result = post.image.name
+    return {
+        'image': result,
+        'placeholder': placeholder(Post.image.field.storage.path(result)),
+    }
+
+
+def _finish(post_id, name, digest, source, target, result):
+    """Сохраняет обработанную картинку и публикует пост.
+
+    result — расширение обработанного файла либо имя уже сохраненного.
+    """
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is None:
+            return
+        previous = post.image.name
+        changes = _store(post, name, digest, target, result)
+        if not post.is_published:
+            changes.update(is_published=True, pub_date=timezone.now())
+        if changes:
+            Post.objects.filter(pk=post_id).update(**changes)
+            discard_export(post.author_id)
+        if previous and previous != changes.get('image', previous):
+            transaction.on_commit(partial(release, previous))
+        if 'image' in changes:
+            tasks.enqueue('posts.make_thumbnails', post_id)
+        if not post.is_published:
+            post.pub_date = changes['pub_date']
+            _published(post)
+    finally:
+        _remove(source, target)
+
+
+def _published(post):
+    """Делает за опубликованный пост то, что сигналы делают при создании."""
+    invalidate_counts(*post.feed_scopes())
+    PostEvent.objects.create(post=post, author_id=post.author_id)
+    trending.record_post(post)
+    group_stats.post_added(post)
+    authors.invalidate(post.author_id)
+    tasks.enqueue('posts.notify_followers', post.pk)
+
+
+def form_is_valid(request, form):
+    """form.is_valid() с учетом файлов, отброшенных из-за размера."""
+    valid = form.is_valid()
+    for field in getattr(request, 'rejected_uploads', ()):
+        form.add_error(
+            field,
+            f'Файл больше {settings.FILE_UPLOAD_MAX_SIZE // 2**20} МБ.',
+        )
+        valid = False
+    return valid
@@ -0,0 +1,44 @@
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.management.base import BaseCommand
+
+from posts.images import placeholder
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    """Заглушки для картинок постов, загруженных до их появления."""
+
+    help = (
+        'Считает заглушки картинок для постов, у которых их еще нет. '
+        'Одинаковые файлы обрабатываются один раз.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        done = {}
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk, placeholder='')
+                .exclude(image='').order_by('pk').values_list('pk', 'image')
+                [:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for name in {name for _, name in batch}.difference(done):
+                try:
+                    path = storage.path(name) if storage.exists(name) else ''
+                except SuspiciousFileOperation:
+                    path = ''
+                done[name] = placeholder(path) if path else ''
+                if done[name]:
+                    Post.objects.filter(image=name, placeholder='').update(
+                        placeholder=done[name]
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {len(done)}.'
+        ))
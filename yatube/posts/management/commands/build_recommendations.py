@@ -0,0 +1,72 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Recommendation
+from posts.recommendations import (
+    FollowGraph, affected_users, save_recommendations
+)
+
+
+class Command(BaseCommand):
+    """Пересчет рекомендаций «на кого подписаться»."""
+
+    help = (
+        'Выгружает граф подписок в разреженную матрицу и сохраняет для '
+        'каждого пользователя лучших кандидатов. По умолчанию граф '
+        'сравнивается со снимком прошлого запуска и пересчитываются '
+        'только затронутые пользователи; --full пересчитывает всех. '
+        'Инкрементальный пересчет приближенный, поэтому всех '
+        'пользователей команда пересчитывает и сама, если с прошлого '
+        'полного пересчета прошло RECOMMENDATIONS_FULL_INTERVAL секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать рекомендации всех пользователей.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=settings.RECOMMENDATIONS_TOP
+        )
+        parser.add_argument(
+            '--graph',
+            default=settings.FOLLOW_GRAPH_PATH,
+            help='Файл снимка графа подписок.',
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        graph = FollowGraph.from_database()
+        followers = graph.transpose()
+        previous = None
+        marker = f"{options['graph']}.full"
+        if not options['full'] and not self._full_due(marker):
+            previous = FollowGraph.load(options['graph'])
+        users = affected_users(graph, followers, previous)
+        if previous is None:
+            users.update(
+                Recommendation.objects.values_list(
+                    'user_id', flat=True
+                ).distinct()
+            )
+        count = save_recommendations(graph, followers, users, options['top'])
+        graph.save(options['graph'])
+        if previous is None:
+            with open(marker, 'w'):
+                pass
+        self.stdout.write(self.style.SUCCESS(
+            f'Связей: {len(graph.indices)}, пересчитано пользователей: '
+            f'{count} за {time.monotonic() - start:.1f} с.'
+        ))
+
+    def _full_due(self, marker):
+        """Пора ли пересчитать всех: по времени файла-отметки marker."""
+        try:
+            age = time.time() - os.path.getmtime(marker)
+        except OSError:
+            return True
+        return age > settings.RECOMMENDATIONS_FULL_INTERVAL
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import write_export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    """Фоновая выгрузка данных пользователя для больших аккаунтов."""
+
+    help = (
+        'Собирает архив с данными пользователя в EXPORT_ROOT; '
+        'страница выгрузки затем отдает готовый файл.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='+')
+
+    def handle(self, *args, **options):
+        for username in options['usernames']:
+            try:
+                user = User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден.')
+            path = write_export(user)
+            if path is None:
+                self.stdout.write(self.style.WARNING(
+                    f'{username}: данные изменились во время сборки, '
+                    'архив не сохранен.'
+                ))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'{username}: {path}'))
@@ -0,0 +1,221 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.paginator import invalidate_counts
+from posts import authors, group_stats, syndication
+from posts.export import discard_export
+from posts.models import Comment, Group, Post, User
+
+
+@contextmanager
+def keep_pub_date(*models):
+    """Не дает auto_now_add перезаписать импортируемые даты."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    """Потоковый импорт постов, комментариев и картинок."""
+
+    help = (
+        'Импортирует посты из JSONL или CSV (колонки author, text, group, '
+        'pub_date, image) пачками через bulk_create. Прерванный импорт '
+        'продолжается с последней сохраненной пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .jsonl или .csv.')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--image-root',
+            default='.',
+            help='Каталог, относительно которого указаны картинки.',
+        )
+        parser.add_argument(
+            '--image-workers',
+            type=int,
+            default=settings.IMPORT_IMAGE_WORKERS,
+            help='Количество потоков копирования картинок.',
+        )
+        parser.add_argument(
+            '--state',
+            help='Файл прогресса, по умолчанию <path>.state.',
+        )
+        parser.add_argument(
+            '--create-authors',
+            action='store_true',
+            help='Создавать отсутствующих авторов без пароля.',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.authors = {}
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.skipped = 0
+        state_path = options['state'] or f'{options["path"]}.state'
+        done = self._load_state(state_path)
+        if done:
+            self.stdout.write(f'Продолжаем импорт со строки {done + 1}.')
+
+        start = time.monotonic()
+        imported = 0
+        with open(options['path'], newline='', encoding='utf-8') as source:
+            records = islice(self._read(source), done, None)
+            with keep_pub_date(Post, Comment), ThreadPoolExecutor(
+                options['image_workers']
+            ) as executor:
+                while True:
+                    batch = list(islice(records, options['batch_size']))
+                    if not batch:
+                        break
+                    self._import_batch(batch, executor)
+                    done += len(batch)
+                    imported += len(batch)
+                    self._save_state(state_path, done)
+                    elapsed = time.monotonic() - start
+                    self.stdout.write(
+                        f'Обработано строк: {done} '
+                        f'({imported / elapsed:.0f} строк/с).'
+                    )
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        invalidate_counts()
+        syndication.reset()
+        group_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершен: {imported} строк за '
+            f'{time.monotonic() - start:.1f} с, пропущено {self.skipped}.'
+        ))
+
+    def _read(self, source):
+        if self.options['path'].endswith('.csv'):
+            yield from csv.DictReader(source)
+            return
+        for number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise CommandError(f'Строка {number}: {error}')
+
+    def _load_state(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path) as state:
+            return json.load(state)['rows']
+
+    def _save_state(self, path, rows):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as state:
+            json.dump({'rows': rows}, state)
+        os.replace(temporary, path)
+
+    def _resolve_authors(self, usernames):
+        """Дополняет карту username -> id недостающими авторами."""
+        missing = set(filter(None, usernames)) - self.authors.keys()
+        if not missing:
+            return
+        self.authors.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'id'
+            )
+        )
+        missing -= self.authors.keys()
+        if missing and self.options['create_authors']:
+            User.objects.bulk_create(
+                User(username=username, password=make_password(None))
+                for username in missing
+            )
+            self.authors.update(
+                User.objects.filter(username__in=missing).values_list(
+                    'username', 'id'
+                )
+            )
+
+    def _build_post(self, record):
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None or not record.get('text'):
+            self.skipped += 1
+            return None
+        return Post(
+            author_id=author_id,
+            group_id=self.groups.get(record.get('group')),
+            text=record['text'],
+            pub_date=self._date(record.get('pub_date')),
+        )
+
+    def _date(self, value):
+        date = value and parse_datetime(value)
+        if not date:
+            return timezone.now()
+        if timezone.is_naive(date):
+            return timezone.make_aware(date)
+        return date
+
+    def _copy_image(self, post, image_path):
+        path = os.path.join(self.options['image_root'], image_path)
+        with open(path, 'rb') as image:
+            post.image.save(os.path.basename(path), File(image), save=False)
+
+    def _import_batch(self, records, executor):
+        self._resolve_authors(
+            entry.get('author')
+            for record in records
+            for entry in [record, *(record.get('comments') or ())]
+        )
+        pairs = [
+            (self._build_post(record), record) for record in records
+        ]
+        pairs = [(post, record) for post, record in pairs if post]
+        images = [
+            (post, record['image'])
+            for post, record in pairs if record.get('image')
+        ]
+        list(executor.map(lambda item: self._copy_image(*item), images))
+
+        posts = [post for post, _ in pairs]
+        with transaction.atomic():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Post.objects.bulk_create(posts)
+            else:
+                for post in posts:
+                    post.save_base(raw=True)
+            comments = Comment.objects.bulk_create(
+                Comment(
+                    post=post,
+                    author_id=self.authors[comment['author']],
+                    text=comment['text'],
+                    pub_date=self._date(comment.get('pub_date')),
+                )
+                for post, record in pairs
+                for comment in record.get('comments') or ()
+                if comment.get('author') in self.authors
+            )
+        # bulk_create не вызывает сигналы: карточки и архивы авторов
+        # сбрасываем сами.
+        author_ids = {obj.author_id for obj in (*posts, *comments)}
+        authors.invalidate(*author_ids)
+        for author_id in author_ids:
+            discard_export(author_id)
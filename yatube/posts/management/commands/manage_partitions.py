@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from core.partitioning import (
+    add_months, create_partition, detach_partition,
+    month_start, partition_month, partitioned_tables, partitions
+)
+
+
+class Command(BaseCommand):
+    """Обслуживание помесячных секций постов и комментариев."""
+
+    help = (
+        'Создает секции на --ahead месяцев вперед для всех '
+        'секционированных таблиц и, с --retain, отсоединяет секции '
+        'старше указанного числа месяцев. Только для PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=settings.PARTITION_MONTHS_AHEAD
+        )
+        parser.add_argument(
+            '--retain',
+            type=int,
+            help='Сколько последних месяцев оставить подключенными.',
+        )
+        parser.add_argument(
+            '--archive-schema',
+            help='Схема, в которую переносятся отсоединенные секции.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Секционирование доступно только в PostgreSQL.')
+        quote = connection.ops.quote_name
+        current = month_start(timezone.now())
+        with connection.cursor() as cursor:
+            for table in partitioned_tables(cursor):
+                for offset in range(options['ahead'] + 1):
+                    month = add_months(current, offset)
+                    try:
+                        with transaction.atomic():
+                            create_partition(cursor, quote, table, month)
+                    except DatabaseError as error:
+                        # В секции по умолчанию уже есть строки этого
+                        # месяца: их нужно перенести вручную.
+                        self.stderr.write(f'{table} {month:%Y-%m}: {error}')
+                if options['retain'] is None:
+                    continue
+                cutoff = add_months(current, -options['retain'])
+                for name in partitions(cursor, table):
+                    month = partition_month(name)
+                    if month is not None and month < cutoff:
+                        detach_partition(
+                            cursor, quote, table, name,
+                            options['archive_schema'],
+                        )
+                        self.stdout.write(f'Отсоединена секция {name}.')
+        self.stdout.write(self.style.SUCCESS('Секции обновлены.'))
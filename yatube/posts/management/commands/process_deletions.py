@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.deletion import run
+from posts.models import DeletionJob
+
+
+class Command(BaseCommand):
+    """Фоновая очистка удаленных пользователей и групп."""
+
+    help = (
+        'Удаляет записи удаленных пользователей и отвязывает посты '
+        'удаленных групп короткими транзакциями по --chunk-size записей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.DELETION_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        for job in DeletionJob.objects.filter(finished=None):
+            run(job, options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{job.get_kind_display()} {job.object_id}: '
+                f'обработано записей {job.processed}.'
+            ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import rebuild
+
+
+class Command(BaseCommand):
+    """Пересчет сводки по группам."""
+
+    help = (
+        'Заново считает число постов, последний пост и активность за '
+        'неделю для всех групп. Нужен после массовых изменений в обход '
+        'сигналов, например update() или загрузки дампа.'
+    )
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Сводка пересчитана для {count} групп.'
+        ))
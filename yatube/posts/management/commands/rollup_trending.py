@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import rollup
+
+
+class Command(BaseCommand):
+    """Пересчет вкладки «Популярное»."""
+
+    help = (
+        'Сворачивает счетчики активности в рейтинг популярных постов и '
+        'групп и сохраняет его в базу. Запускается периодически, например '
+        'раз в несколько минут.'
+    )
+
+    def handle(self, *args, **options):
+        trending = rollup()
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярных постов: {len(trending["posts"])}, '
+            f'групп: {len(trending["groups"])}.'
+        ))
@@ -0,0 +1,21 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from posts.stream import EventStream
+
+
+class Command(BaseCommand):
+    """Запуск сервера потока новых постов."""
+
+    help = 'Отдает уведомления о новых постах через Server-Sent Events.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'Поток событий на {options["host"]}:{options["port"]}'
+        )
+        asyncio.run(EventStream().serve(options['host'], options['port']))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    """Рассылка писем-сводок о новых постах."""
+
+    help = (
+        'Отправляет подписчикам накопленные уведомления о новых постах, '
+        'по одному письму на получателя. Запускается периодически, '
+        'например раз в час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NOTIFY_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}.'))
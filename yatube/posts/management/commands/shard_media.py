@@ -0,0 +1,65 @@
+import os
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    """Перенос картинок постов в каталоги по хэшу содержимого."""
+
+    help = (
+        'Копирует картинки постов в подкаталоги по хэшу содержимого и '
+        'пачками переписывает Post.image. Старый файл удаляется, только '
+        'когда на него не ссылается ни один пост, поэтому команду можно '
+        'запускать на работающем сайте и прерывать в любой момент.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help='Не удалять исходные файлы.',
+        )
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        upload_to = Post.image.field.upload_to
+        moved = missing = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).exclude(image='')
+                .order_by('pk').values_list('pk', 'image')
+                [:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for name in {name for _, name in batch}:
+                if storage.is_sharded(name):
+                    continue
+                try:
+                    exists = storage.exists(name)
+                except SuspiciousFileOperation:
+                    exists = False
+                if not exists:
+                    missing += 1
+                    continue
+                with storage.open(name) as content:
+                    new_name = storage.save(
+                        os.path.join(upload_to, os.path.basename(name)),
+                        content,
+                    )
+                moved += Post.objects.filter(image=name).update(
+                    image=new_name
+                )
+                if not options['keep_old']:
+                    # Плоские имена не по хэшу, повторно их не сохраняют.
+                    storage.release(name, Post.objects.filter(image=name))
+            self.stdout.write(f'Проверены посты до id={last_pk}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено картинок: {moved}, не найдено файлов: {missing}.'
+        ))
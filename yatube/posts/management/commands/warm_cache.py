@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    """Прогрев кэша первых страниц ленты, групп и популярных авторов."""
+
+    help = (
+        'Заполняет кэш первыми страницами лент. Страницы рендерятся в '
+        'процессе команды, поэтому нужен общий кэш (CACHE_LOCATION).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=settings.CACHE_WARM_PAGES,
+            help='Сколько первых страниц каждой ленты прогревать.',
+        )
+        parser.add_argument(
+            '--authors',
+            type=int,
+            default=settings.CACHE_WARM_AUTHORS,
+            help='Сколько авторов с наибольшим числом подписчиков брать.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.CACHE_WARM_WORKERS,
+            help='Количество параллельных запросов.',
+        )
+        parser.add_argument(
+            '--host',
+            default=settings.CACHE_WARM_HOST,
+            help='Host, под которым страницы попадут в кэш.',
+        )
+
+    def _feeds(self, authors):
+        """Адреса лент, которые нужно прогреть."""
+        feeds = [reverse('posts:index')]
+        feeds += [
+            reverse('posts:group_list', args=(slug, ))
+            for slug in Group.objects.values_list('slug', flat=True)
+        ]
+        usernames = User.objects.annotate(
+            followers=Count('following')
+        ).order_by('-followers').values_list('username', flat=True)
+        feeds += [
+            reverse('posts:profile', args=(username, ))
+            for username in usernames[:authors]
+        ]
+        return feeds
+
+    def _warm(self, host, url):
+        """Запрашивает страницу, чтобы она отрисовалась и легла в кэш."""
+        start = time.monotonic()
+        status = Client(HTTP_HOST=host).get(url).status_code
+        return url, status, time.monotonic() - start
+
+    def _warm_in_thread(self, host, url):
+        try:
+            return self._warm(host, url)
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            raise CommandError(
+                'Кэш процесса не виден веб-серверу: задайте CACHE_LOCATION.'
+            )
+        host = options['host']
+        urls = [
+            url if page == 1 else f'{url}?page={page}'
+            for url in self._feeds(options['authors'])
+            for page in range(1, options['pages'] + 1)
+        ]
+        start = time.monotonic()
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(options['workers']) as executor:
+                results = list(executor.map(
+                    lambda url: self._warm_in_thread(host, url), urls
+                ))
+        else:
+            results = [self._warm(host, url) for url in urls]
+        total = time.monotonic() - start
+
+        for url, status, elapsed in results:
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{status} {elapsed * 1000:.1f} мс {url}')
+        timings = [elapsed for _, _, elapsed in results] or [0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {len(results)} за {total:.2f} с '
+            f'(среднее {sum(timings) / len(timings) * 1000:.1f} мс, '
+            f'максимум {max(timings) * 1000:.1f} мс).'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_published',
+            field=models.BooleanField(default=True, help_text='Снимается, пока обрабатывается загруженная картинка', verbose_name='Опубликован'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Комментарии к посту'), ('group', 'Посты в группе')], max_length=5, verbose_name='Что считаем')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('bucket', models.DateTimeField(db_index=True, verbose_name='Начало интервала')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Событий')),
+            ],
+            options={
+                'verbose_name': 'Счетчик активности',
+                'verbose_name_plural': 'Счетчики активности',
+                'unique_together': {('kind', 'object_id', 'bucket')},
+            },
+        ),
+    ]
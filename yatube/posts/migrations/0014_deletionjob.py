@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_activitycounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа')], max_length=5, verbose_name='Что удаляем')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('step', models.CharField(blank=True, max_length=30, verbose_name='Текущий шаг')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано записей')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Поставлено в очередь')),
+                ('finished', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Задача удаления',
+                'verbose_name_plural': 'Задачи удаления',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='is_active',
+            field=models.BooleanField(default=True, help_text='Снимается сразу при удалении, пока идет очистка постов', verbose_name='Активна'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, limit_choices_to={'is_active': True}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Группа'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+import core.partitioning
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_deletionjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post', verbose_name='Комментируемый пост'),
+        ),
+        migrations.AlterField(
+            model_name='postevent',
+            name='post',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='posts.Post', verbose_name='Пост'),
+        ),
+        core.partitioning.PartitionByMonth('post', 'pub_date'),
+        core.partitioning.PartitionByMonth('comment', 'pub_date'),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_partition_by_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('latest_pub_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего поста')),
+                ('daily_posts', models.CharField(default='0,0,0,0,0,0,0', max_length=100, verbose_name='Постов по дням, начиная с daily_date')),
+                ('daily_date', models.DateField(blank=True, null=True, verbose_name='День первого значения daily_posts')),
+                ('latest_post', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post', verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+                'ordering': ('-latest_pub_date',),
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_error',
+            field=models.CharField(blank=True, editable=False, help_text='Видна автору, пока он не загрузит другую картинку', max_length=200, verbose_name='Ошибка обработки картинки'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_unique_follow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.TextField(help_text='Карточки постов и группы в JSON', verbose_name='Рейтинг')),
+                ('updated', models.DateTimeField(verbose_name='Посчитан')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг популярного',
+                'verbose_name_plural': 'Рейтинги популярного',
+            },
+        ),
+    ]
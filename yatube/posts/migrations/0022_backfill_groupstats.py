@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def backfill_group_stats(apps, schema_editor):
+    """Считает сводки групп по постам, созданным до появления сводок."""
+    from posts.group_stats import rebuild
+
+    rebuild(
+        apps.get_model('posts', 'Group'),
+        apps.get_model('posts', 'GroupStats'),
+        apps.get_model('posts', 'Post'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_trendingsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_group_stats, migrations.RunPython.noop
+        ),
+    ]
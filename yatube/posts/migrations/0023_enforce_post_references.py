@@ -0,0 +1,17 @@
+from django.db import migrations
+
+import core.partitioning
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_backfill_groupstats'),
+    ]
+
+    operations = [
+        core.partitioning.EnforceReference('comment', 'post'),
+        core.partitioning.EnforceReference('postevent', 'post'),
+        core.partitioning.EnforceReference('groupstats', 'latest_post'),
+        core.partitioning.EnforceReference('notification', 'post'),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 
 from core.models import UniversalModel
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -24,6 +26,11 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'
+            ),
+        ]
 
 
 class Group(models.Model):
@@ -37,6 +44,11 @@ class Group(models.Model):
         verbose_name='Уникальное обозначение группы',
     )
     description = models.TextField(verbose_name='Описание группы')
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name='Активна',
+        help_text='Снимается сразу при удалении, пока идет очистка постов',
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -47,6 +59,20 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Выборки постов."""
+
+    def live(self):
+        """Посты, кроме постов авторов, удаление которых уже идет."""
+        return self.exclude(
+            author_id__in=DeletionJob.pending(DeletionJob.USER)
+        )
+
+    def published(self):
+        """Посты, картинки которых уже обработаны, без удаляемых авторов."""
+        return self.live().filter(is_published=True)
+
+
 class Post(UniversalModel):
     """Определение модели Post и ее полей."""
     text = models.TextField(verbose_name='Текст публикации')
@@ -60,6 +86,7 @@ class Post(UniversalModel):
         Group,
         on_delete=models.SET_NULL,
         related_name='posts',
+        limit_choices_to={'is_active': True},
         blank=True,
         null=True,
         verbose_name='Группа',
@@ -67,9 +94,32 @@ class Post(UniversalModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        # По имени файла media находит пост картинки.
+        db_index=True,
+    )
+    placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Заглушка картинки',
+        help_text='Крошечная копия картинки в data URI, видна до загрузки',
+    )
+    image_error = models.CharField(
+        max_length=200,
+        blank=True,
+        editable=False,
+        verbose_name='Ошибка обработки картинки',
+        help_text='Видна автору, пока он не загрузит другую картинку',
+    )
+    is_published = models.BooleanField(
+        default=True,
+        verbose_name='Опубликован',
+        help_text='Снимается, пока обрабатывается загруженная картинка',
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date', )
         verbose_name = 'Пост'
@@ -79,6 +129,17 @@ class Post(UniversalModel):
         """Вывод содержания поста."""
         return self.text[:15]
 
+    def feed_scopes(self, *group_ids):
+        """Ленты, в которые попадает пост: общая, автора и групп.
+
+        group_ids — прежние группы поста, если он из них ушел.
+        """
+        scopes = {'posts', f'author:{self.author_id}'}
+        for group_id in (self.group_id, *group_ids):
+            if group_id:
+                scopes.add(f'group:{group_id}')
+        return scopes
+
 
 class Comment(UniversalModel):
     """Определение подели комментариев."""
@@ -92,6 +153,8 @@ class Comment(UniversalModel):
         Post,
         on_delete=models.CASCADE,
         related_name='comments',
+        # posts_post секционирована, см. миграции 0015 и 0023.
+        db_constraint=False,
         verbose_name='Комментируемый пост'
     )
     text = models.TextField(
@@ -102,3 +165,216 @@ class Comment(UniversalModel):
         ordering = ('-pub_date', )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+
+
+class PostEvent(models.Model):
+    """Журнал новых постов для потока событий."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='events',
+        db_constraint=False,
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Время события',
+    )
+
+    class Meta:
+        ordering = ('id', )
+        verbose_name = 'Событие ленты'
+        verbose_name_plural = 'События ленты'
+
+
+class Recommendation(models.Model):
+    """Автор, которого стоит предложить пользователю для подписки."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        ordering = ('-score', )
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+
+class ActivityCounter(models.Model):
+    """Счетчик активности объекта за интервал времени."""
+    POST_COMMENTS = 'post'
+    GROUP_POSTS = 'group'
+    KINDS = (
+        (POST_COMMENTS, 'Комментарии к посту'),
+        (GROUP_POSTS, 'Посты в группе'),
+    )
+
+    kind = models.CharField(
+        max_length=5,
+        choices=KINDS,
+        verbose_name='Что считаем',
+    )
+    object_id = models.PositiveIntegerField(verbose_name='id объекта')
+    bucket = models.DateTimeField(
+        db_index=True,
+        verbose_name='Начало интервала',
+    )
+    count = models.PositiveIntegerField(default=0, verbose_name='Событий')
+
+    class Meta:
+        unique_together = ('kind', 'object_id', 'bucket')
+        verbose_name = 'Счетчик активности'
+        verbose_name_plural = 'Счетчики активности'
+
+
+class TrendingSnapshot(models.Model):
+    """Последний рейтинг популярного, посчитанный rollup_trending."""
+    data = models.TextField(
+        verbose_name='Рейтинг',
+        help_text='Карточки постов и группы в JSON',
+    )
+    updated = models.DateTimeField(verbose_name='Посчитан')
+
+    class Meta:
+        verbose_name = 'Рейтинг популярного'
+        verbose_name_plural = 'Рейтинги популярного'
+
+
+class DeletionJob(models.Model):
+    """Фоновое удаление пользователя или группы и связанных записей."""
+    USER = 'user'
+    GROUP = 'group'
+    KINDS = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField(
+        max_length=5,
+        choices=KINDS,
+        verbose_name='Что удаляем',
+    )
+    object_id = models.PositiveIntegerField(verbose_name='id объекта')
+    step = models.CharField(
+        max_length=30,
+        blank=True,
+        verbose_name='Текущий шаг',
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано записей',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлено в очередь',
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Завершено',
+    )
+
+    class Meta:
+        ordering = ('id', )
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    @classmethod
+    def pending(cls, kind):
+        """id объектов kind, удаление которых поставлено, но не завершено.
+
+        Незавершенная задача и есть отметка об удалении: пользователь
+        скрывается по ней, а не по is_active, который снимают и по
+        другим причинам.
+        """
+        return cls.objects.filter(kind=kind, finished=None).values_list(
+            'object_id', flat=True
+        )
+
+
+class GroupStats(models.Model):
+    """Сводка по группе, обновляется при сохранении и удалении постов."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа',
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов',
+    )
+    latest_post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False,
+        verbose_name='Последний пост',
+    )
+    latest_pub_date = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата последнего поста',
+    )
+    daily_posts = models.CharField(
+        max_length=100,
+        default='0,0,0,0,0,0,0',
+        verbose_name='Постов по дням, начиная с daily_date',
+    )
+    daily_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='День первого значения daily_posts',
+    )
+
+    class Meta:
+        ordering = ('-latest_pub_date', )
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+
+class Notification(models.Model):
+    """Новый пост автора, о котором подписчик узнает из письма-сводки."""
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        # posts_post секционирована, см. миграции 0015 и 0023.
+        db_constraint=False,
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+
+    class Meta:
+        unique_together = ('recipient', 'post')
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
@@ -0,0 +1,123 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.core import mail
+from django.db.models import Exists, OuterRef
+from django.template.loader import get_template
+from django.urls import reverse
+
+from .models import DeletionJob, Follow, Notification, Post
+
+# Сколько уведомлений вставляется за один запрос.
+FAN_OUT_CHUNK_SIZE = 1000
+
+
+def fan_out(post_id):
+    """Заводит уведомления о посте всем подписчикам автора с email.
+
+    Повторный запуск безопасен: дубликаты отбрасывает unique_together.
+    """
+    post = Post.objects.published().filter(pk=post_id).first()
+    if post is None:
+        return 0
+    followers = Follow.objects.filter(
+        author_id=post.author_id, user__is_active=True
+    ).exclude(user__email='').order_by('user_id').values_list(
+        'user_id', flat=True
+    ).distinct().iterator(chunk_size=FAN_OUT_CHUNK_SIZE)
+    created = 0
+    chunk = []
+    for user_id in followers:
+        chunk.append(Notification(recipient_id=user_id, post_id=post_id))
+        if len(chunk) == FAN_OUT_CHUNK_SIZE:
+            created += len(chunk)
+            Notification.objects.bulk_create(chunk, ignore_conflicts=True)
+            chunk = []
+    Notification.objects.bulk_create(chunk, ignore_conflicts=True)
+    return created + len(chunk)
+
+
+def _batch(batch_size):
+    """Уведомления следующих batch_size получателей.
+
+    author_deleted отмечает посты авторов, удаление которых уже идет.
+    """
+    recipients = list(
+        Notification.objects.order_by('recipient_id').values_list(
+            'recipient_id', flat=True
+        ).distinct()[:batch_size]
+    )
+    return list(
+        Notification.objects.filter(
+            recipient_id__in=recipients
+        ).select_related(
+            'recipient', 'post__author', 'post__group'
+        ).annotate(author_deleted=Exists(
+            DeletionJob.objects.filter(
+                kind=DeletionJob.USER,
+                finished=None,
+                object_id=OuterRef('post__author_id'),
+            )
+        )).order_by('recipient_id', '-post__pub_date', '-post_id')
+    )
+
+
+def _render_posts(notifications):
+    """Фрагменты писем по одному на пост: общий пост всех получателей
+    пачки рендерится один раз."""
+    template = get_template('posts/email/digest_post.txt')
+    fragments = {}
+    for notification in notifications:
+        post = notification.post
+        if post.pk in fragments:
+            continue
+        if post.is_published and not notification.author_deleted:
+            fragments[post.pk] = template.render({
+                'post': post,
+                'url': settings.SITE_URL + reverse(
+                    'posts:post_detail', args=(post.pk, )
+                ),
+            })
+        else:
+            fragments[post.pk] = None
+    return fragments
+
+
+def _messages(notifications, fragments, connection):
+    template = get_template('posts/email/digest.txt')
+    for recipient, items in groupby(
+        notifications, key=lambda notification: notification.recipient
+    ):
+        posts = [
+            fragments[item.post_id] for item in items
+            if fragments[item.post_id] is not None
+        ]
+        if posts and recipient.email and recipient.is_active:
+            yield mail.EmailMessage(
+                f'Новые посты ваших авторов: {len(posts)}',
+                template.render({'user': recipient, 'posts': posts}),
+                to=[recipient.email],
+                connection=connection,
+            )
+
+
+def send_digests(batch_size):
+    """Отправляет накопленные уведомления письмами-сводками.
+
+    Получатели обрабатываются пачками по batch_size; для всех писем
+    используется одно соединение с почтовым сервером. Возвращает число
+    отправленных писем.
+    """
+    sent = 0
+    with mail.get_connection() as connection:
+        while True:
+            notifications = _batch(batch_size)
+            if not notifications:
+                return sent
+            fragments = _render_posts(notifications)
+            sent += connection.send_messages(list(
+                _messages(notifications, fragments, connection)
+            )) or 0
+            Notification.objects.filter(
+                pk__in=[notification.pk for notification in notifications]
+            ).delete()
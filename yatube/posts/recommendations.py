@@ -0,0 +1,211 @@
+import heapq
+import os
+import pickle
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import follows
+from .models import Follow, Recommendation
+
+# Сколько связей читается из базы за один запрос.
+GRAPH_CHUNK_SIZE = 10000
+
+# Сколько подписчиков каждого автора учитывается при поиске похожих
+# пользователей: у популярных авторов их миллионы.
+CO_FOLLOW_SAMPLE = 100
+
+# Сколько самых похожих пользователей дают голоса за кандидатов.
+SIMILAR_USERS = 50
+
+SECOND_DEGREE_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+
+# Сколько пользователей сохраняется за одну транзакцию.
+SAVE_BATCH_SIZE = 500
+
+
+class FollowGraph:
+    """Граф подписок в виде разреженной матрицы в формате CSR.
+
+    Строка пользователя users[i] — отсортированные id авторов в
+    indices[indptr[i]:indptr[i + 1]]. Все три массива — array('q'),
+    поэтому миллионы связей занимают по 8 байт.
+    """
+
+    def __init__(self, users, indptr, indices):
+        self.users = users
+        self.indptr = indptr
+        self.indices = indices
+        self._rows = {user_id: row for row, user_id in enumerate(users)}
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Граф из пар (user_id, author_id), отсортированных по парам."""
+        users, indptr, indices = array('q'), array('q', [0]), array('q')
+        for user_id, author_id in edges:
+            if not users or users[-1] != user_id:
+                if users:
+                    indptr.append(len(indices))
+                users.append(user_id)
+            indices.append(author_id)
+        if users:
+            indptr.append(len(indices))
+        return cls(users, indptr, indices)
+
+    @classmethod
+    def from_database(cls):
+        edges = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id'
+        ).distinct()
+        return cls.from_edges(edges.iterator(chunk_size=GRAPH_CHUNK_SIZE))
+
+    @classmethod
+    def load(cls, path):
+        """Сохраненный снимок графа или None, если его еще нет."""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as snapshot:
+            return cls(*pickle.load(snapshot))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as snapshot:
+            pickle.dump(
+                (self.users, self.indptr, self.indices), snapshot,
+                pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(temporary, path)
+
+    def row(self, user_id):
+        row = self._rows.get(user_id)
+        if row is None:
+            return self.indices[0:0]
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def transpose(self):
+        """Обратный граф: для каждого автора — его подписчики."""
+        counts = Counter(self.indices)
+        authors = array('q', sorted(counts))
+        indptr = array('q', [0])
+        for author_id in authors:
+            indptr.append(indptr[-1] + counts[author_id])
+        position = {
+            author_id: indptr[row] for row, author_id in enumerate(authors)
+        }
+        indices = array('q', bytes(8 * len(self.indices)))
+        for user_id in self.users:
+            for author_id in self.row(user_id):
+                indices[position[author_id]] = user_id
+                position[author_id] += 1
+        return FollowGraph(authors, indptr, indices)
+
+    def changed_users(self, previous):
+        """Пользователи, подписки которых отличаются от снимка previous."""
+        return {
+            user_id
+            for user_id in set(self.users).union(previous.users)
+            if self.row(user_id) != previous.row(user_id)
+        }
+
+
+def score_candidates(user_id, graph, followers, limit):
+    """Лучшие кандидаты для подписки: [(оценка, author_id), ...].
+
+    Учитываются авторы, на которых подписаны те, на кого подписан
+    пользователь, и авторы, которых читают похожие пользователи.
+    """
+    followed = graph.row(user_id)
+    second_degree = Counter()
+    similar = Counter()
+    for author_id in followed:
+        second_degree.update(graph.row(author_id))
+        similar.update(followers.row(author_id)[:CO_FOLLOW_SAMPLE])
+    similar.pop(user_id, None)
+    co_follow = Counter()
+    for other_id, _ in similar.most_common(SIMILAR_USERS):
+        co_follow.update(graph.row(other_id))
+
+    excluded = set(followed)
+    excluded.add(user_id)
+    scores = (
+        (
+            second_degree[author_id] * SECOND_DEGREE_WEIGHT
+            + co_follow[author_id] * CO_FOLLOW_WEIGHT,
+            author_id,
+        )
+        for author_id in second_degree.keys() | co_follow.keys()
+        if author_id not in excluded
+    )
+    return heapq.nlargest(limit, scores)
+
+
+def affected_users(graph, followers, previous):
+    """Пользователи, чьи рекомендации могли измениться с прошлого раза.
+
+    Это сами изменившие подписки, их подписчики (у них меняется второй
+    круг) и подписчики авторов, у которых изменилась выборка
+    подписчиков для поиска похожих. Голоса похожих пользователей
+    меняются и от их собственных подписок, а такие пользователи не
+    отслеживаются: инкрементальный пересчет приближенный, и
+    build_recommendations раз в RECOMMENDATIONS_FULL_INTERVAL секунд
+    пересчитывает всех.
+    """
+    if previous is None:
+        return set(graph.users)
+    changed = graph.changed_users(previous)
+    affected = set(changed)
+    for user_id in changed:
+        affected.update(followers.row(user_id))
+        for author_id in set(graph.row(user_id)).symmetric_difference(
+            previous.row(user_id)
+        ):
+            author_followers = followers.row(author_id)
+            # Выборка — первые CO_FOLLOW_SAMPLE id подписчиков: подписка
+            # или отписка с большим id ее не меняет.
+            if (
+                len(author_followers) <= CO_FOLLOW_SAMPLE
+                or user_id <= author_followers[CO_FOLLOW_SAMPLE - 1]
+            ):
+                affected.update(author_followers)
+    return affected
+
+
+def save_recommendations(graph, followers, user_ids, limit):
+    """Пересчитывает и сохраняет рекомендации пачками."""
+    user_ids = sorted(user_ids)
+    for start in range(0, len(user_ids), SAVE_BATCH_SIZE):
+        batch = user_ids[start:start + SAVE_BATCH_SIZE]
+        rows = [
+            Recommendation(user_id=user_id, author_id=author_id, score=score)
+            for user_id in batch
+            for score, author_id in score_candidates(
+                user_id, graph, followers, limit
+            )
+        ]
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=batch).delete()
+            Recommendation.objects.bulk_create(rows)
+    return len(user_ids)
+
+
+def for_user(user):
+    """Авторы, которых стоит предложить пользователю, одним запросом."""
+    if not user.is_authenticated:
+        return []
+    recommended = list(
+        Recommendation.objects.filter(user=user).select_related(
+            'author'
+        )[:settings.RECOMMENDATIONS_SHOWN]
+    )
+    # С прошлого пересчета пользователь мог подписаться на кого-то.
+    followed = follows.followed_among(
+        user.id, [item.author_id for item in recommended]
+    )
+    return [
+        item.author for item in recommended
+        if item.author_id not in followed
+    ]
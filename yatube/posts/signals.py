@@ -0,0 +1,159 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+
+from core import tasks
+from core.paginator import invalidate_counts
+
+from . import (
+    authors, export, follows, group_stats, images, syndication, trending
+)
+from .models import (
+    ActivityCounter, Follow, GroupStats, Post, PostEvent, User
+)
+
+
+def warm_cache_after_migrate(sender, **kwargs):
+    """Прогревает кэш лент сразу после применения миграций."""
+    if settings.SHARED_CACHE:
+        call_command('warm_cache')
+
+
+def log_new_post(sender, instance, created, raw=False, **kwargs):
+    """Записывает новый пост в журнал событий и счетчики популярного
+    и ставит в очередь уведомления подписчиков.
+
+    Посты с картинкой попадают в журнал после ее обработки.
+    """
+    if created and not raw and instance.is_published:
+        PostEvent.objects.create(post=instance, author_id=instance.author_id)
+        trending.record_post(instance)
+        tasks.enqueue('posts.notify_followers', instance.pk)
+
+
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    """Учитывает комментарий в счетчиках популярного."""
+    if created and not raw:
+        trending.record(ActivityCounter.POST_COMMENTS, instance.post_id)
+
+
+def release_post_image(sender, instance, **kwargs):
+    """Удаляет картинку удаленного поста, если она больше не нужна."""
+    if instance.image:
+        transaction.on_commit(partial(images.release, instance.image.name))
+
+
+def invalidate_post_counts(sender, instance, created=False, raw=False,
+                           **kwargs):
+    """Сбрасывает число постов лент, состав которых изменился.
+
+    Правка текста ленты не меняет, поэтому версии не трогает.
+    """
+    if raw:
+        return
+    before = getattr(instance, '_stats_before', None)
+    if before is None or created:
+        invalidate_counts(*instance.feed_scopes())
+        return
+    old_group_id, was_published = before
+    if (old_group_id, was_published) != (
+        instance.group_id, instance.is_published
+    ):
+        invalidate_counts(*instance.feed_scopes(old_group_id))
+
+
+def invalidate_follow_counts(sender, instance, **kwargs):
+    invalidate_counts(f'follow:{instance.user_id}')
+
+
+def invalidate_follows(sender, instance, **kwargs):
+    """Подписки пользователя изменились: сбрасываем их кэш."""
+    follows.invalidate(instance.user_id)
+
+
+def invalidate_author_cards(sender, instance, **kwargs):
+    """Сбрасывает карточки авторов, чьи счетчики или имя изменились."""
+    if isinstance(instance, User):
+        authors.invalidate(instance.pk)
+    elif isinstance(instance, Follow):
+        authors.invalidate(instance.user_id, instance.author_id)
+    else:
+        authors.invalidate(instance.author_id)
+
+
+def discard_author_export(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    """Собранный архив автора поста или комментария устарел.
+
+    Сохранение только полей, которых нет в архиве, его не трогает.
+    """
+    if raw:
+        return
+    if update_fields and not export.EXPORTED_FIELDS.intersection(
+        update_fields
+    ):
+        return
+    export.discard_export(instance.author_id)
+
+
+def forget_post_syndication(sender, instance, created=False, raw=False,
+                            **kwargs):
+    """Сбрасывает ленты и карты сайта с измененным или удаленным постом."""
+    if raw or created:
+        return
+    old_group_id = (getattr(instance, '_stats_before', None) or (None, ))[0]
+    old_date = getattr(instance, '_pub_date_before', None)
+    syndication.forget(
+        instance,
+        group_ids=(old_group_id, ),
+        dates=(old_date, ) if old_date else (),
+    )
+
+
+def forget_user_syndication(sender, instance, created, raw=False,
+                            update_fields=None, **kwargs):
+    """Имя автора видно во всех лентах: сбрасываем их."""
+    if created or raw:
+        return
+    if update_fields and not set(update_fields) & {
+        'username', 'first_name', 'last_name'
+    }:
+        return
+    syndication.reset()
+
+
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    """Запоминает группу и публикацию поста до редактирования."""
+    if instance.pk and not raw:
+        before = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'is_published', 'pub_date'
+        ).first()
+        if before is not None:
+            instance._stats_before = before[:2]
+            instance._pub_date_before = before[2]
+
+
+def update_group_stats(sender, instance, created, raw=False, **kwargs):
+    """Обновляет сводки групп, которых коснулось сохранение поста."""
+    if raw:
+        return
+    old_group_id, was_published = (
+        getattr(instance, '_stats_before', None) or (None, False)
+    )
+    moved = old_group_id != instance.group_id
+    if was_published and (moved or not instance.is_published):
+        group_stats.post_removed(instance, old_group_id)
+    if instance.is_published and (moved or not was_published):
+        group_stats.post_added(instance)
+
+
+def remove_from_group_stats(sender, instance, **kwargs):
+    if instance.is_published:
+        group_stats.post_removed(instance, instance.group_id)
+
+
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Размер блока, которым файл читается при подсчете хэша.
+HASH_BLOCK_SIZE = 64 * 1024
+
+# Сколько уровней подкаталогов и сколько символов хэша на уровень.
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+
+def file_digest(content):
+    """sha256 содержимого файла, позиция чтения возвращается в начало."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_BLOCK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по хэшу содержимого.
+
+    Одинаковые загрузки получают одно имя и хранятся на диске один раз,
+    поэтому файл удаляется только через release(), когда на него больше
+    не ссылается ни одна запись. Повторное сохранение обновляет mtime
+    файла, и release() не трогает файлы моложе grace секунд: ссылка на
+    только что сохраненный файл может быть еще не зафиксирована.
+    Файлы раскладываются по подкаталогам из первых символов хэша:
+    posts/ab/cd/abcd....jpg.
+    """
+
+    def hashed_name(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        digest = file_digest(content)
+        return os.path.join(
+            directory, *self._shards(digest), digest + extension
+        )
+
+    def _shards(self, digest):
+        return [
+            digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH]
+            for level in range(SHARD_DEPTH)
+        ]
+
+    def is_sharded(self, name):
+        """Лежит ли файл уже в каталоге, вычисленном по его хэшу."""
+        *shards, filename = name.split('/')[-SHARD_DEPTH - 1:]
+        digest = os.path.splitext(filename)[0]
+        return len(digest) == 64 and shards == self._shards(digest)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.touch(name):
+            return name
+        return self._save(name, content)
+
+    def touch(self, name):
+        """Отмечает файл как только что использованный.
+
+        Возвращает False, если файла нет.
+        """
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def is_fresh(self, name, grace):
+        """Использовался ли файл в последние grace секунд."""
+        try:
+            modified = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return modified > time.time() - grace
+
+    def _save(self, name, content):
+        # Файл пишется во временный и переименовывается: параллельная
+        # загрузка того же содержимого просто перезапишет его тем же.
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        with tempfile.NamedTemporaryFile(
+            dir=directory, prefix='.upload-', delete=False
+        ) as target:
+            for chunk in content.chunks():
+                target.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(target.name, self.file_permissions_mode)
+        os.replace(target.name, path)
+        return name.replace('\\', '/')
+
+    def release(self, name, references, grace=0):
+        """Удаляет файл, если queryset references пуст и файл не
+        использовался последние grace секунд. Возвращает True, если
+        файл остался только из-за grace.
+        """
+        if not name or references.exists():
+            return False
+        if self.is_fresh(name, grace):
+            return True
+        try:
+            self.delete(name)
+        except SuspiciousFileOperation:
+            # Путь вне MEDIA_ROOT: такой файл хранилищу не принадлежит.
+            pass
+        return False
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.db import DatabaseError, connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from . import follows
+from .models import Post, PostEvent
+
+logger = logging.getLogger(__name__)
+
+# Сколько событий журнала обрабатывается за один опрос.
+EVENTS_BATCH = 100
+
+# Сколько сообщений может скопиться у медленного клиента.
+CLIENT_QUEUE_SIZE = 20
+
+PRUNE_INTERVAL = 60 * 60
+
+HEARTBEAT = b': ping\n\n'
+
+
+def latest_event_id():
+    """id последнего события журнала."""
+    return PostEvent.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first() or 0
+
+
+def fetch_events(after_id):
+    """Новые события журнала с отрисованными карточками постов."""
+    events = PostEvent.objects.filter(
+        id__gt=after_id
+    ).values_list('id', 'post_id', 'author_id')[:EVENTS_BATCH]
+    events = list(events)
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for _, post_id, _ in events]
+    )
+    return [
+        (
+            event_id,
+            author_id,
+            render_to_string(
+                'posts/include/post.html', {'post': posts[post_id]}
+            ),
+        )
+        for event_id, post_id, author_id in events
+        if post_id in posts
+    ]
+
+
+def session_user_id(session_key):
+    """id пользователя, которому принадлежит сессия."""
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(session_key).get(SESSION_KEY)
+
+
+def followed_authors(user_id):
+    return set(follows.followed_ids(user_id))
+
+
+def prune_events():
+    """Удаляет из журнала события старше SSE_EVENT_RETENTION."""
+    PostEvent.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            seconds=settings.SSE_EVENT_RETENTION
+        )
+    ).delete()
+
+
+def format_message(events):
+    """Сообщение SSE о новых постах, свежие карточки идут первыми."""
+    data = json.dumps({
+        'count': len(events),
+        'cards': [card for _, _, card in reversed(events)],
+    })
+    return f'id: {events[-1][0]}\nevent: posts\ndata: {data}\n\n'.encode()
+
+
+class StreamClient:
+    """Подключенный клиент и авторы, на которых он подписан."""
+
+    def __init__(self, writer, authors=None):
+        self.writer = writer
+        self.authors = authors
+        self.queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+
+    def select(self, events):
+        if self.authors is None:
+            return events
+        return [event for event in events if event[1] in self.authors]
+
+
+class EventStream:
+    """Сервер потока новых постов.
+
+    Один цикл опрашивает журнал PostEvent и рассылает отрисованные
+    карточки всем клиентам, поэтому нагрузка на базу не зависит от
+    числа открытых вкладок.
+    """
+
+    def __init__(self):
+        self.path = urlsplit(settings.SSE_URL).path
+        self.clients = set()
+        self.last_id = 0
+
+    async def db(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def poll(self):
+        self.last_id = await self.db(latest_event_id)
+        pruned_at = 0
+        while True:
+            await asyncio.sleep(settings.SSE_POLL_INTERVAL)
+            try:
+                if time.monotonic() - pruned_at > PRUNE_INTERVAL:
+                    await self.db(prune_events)
+                    pruned_at = time.monotonic()
+                events = await self.db(fetch_events, self.last_id)
+            except DatabaseError:
+                logger.exception('Не удалось прочитать журнал событий')
+                await self.db(connections.close_all)
+                continue
+            if events:
+                self.last_id = events[-1][0]
+                self.broadcast(events)
+
+    def broadcast(self, events):
+        for client in list(self.clients):
+            selected = client.select(events)
+            if not selected:
+                continue
+            try:
+                client.queue.put_nowait(format_message(selected))
+            except asyncio.QueueFull:
+                self.clients.discard(client)
+                client.writer.close()
+
+    async def handle(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10)
+            method, target, headers = self._parse(head)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ValueError):
+            writer.close()
+            return
+        url = urlsplit(target)
+        if method != 'GET' or url.path != self.path:
+            return self._reject(writer, '404 Not Found')
+
+        authors = None
+        if parse_qs(url.query).get('feed') == ['follow']:
+            morsel = SimpleCookie(headers.get('cookie', '')).get(
+                settings.SESSION_COOKIE_NAME
+            )
+            user_id = morsel and await self.db(session_user_id, morsel.value)
+            if not user_id:
+                return self._reject(writer, '403 Forbidden')
+            authors = await self.db(followed_authors, user_id)
+
+        writer.write(self._response_head(headers.get('origin')))
+        client = StreamClient(writer, authors)
+        last_event_id = headers.get('last-event-id', '')
+        if last_event_id.isdigit():
+            missed = client.select(
+                await self.db(fetch_events, int(last_event_id))
+            )
+            if missed:
+                writer.write(format_message(missed))
+        self.clients.add(client)
+        try:
+            await self._send(client)
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    async def _send(self, client):
+        while not client.writer.is_closing():
+            try:
+                message = await asyncio.wait_for(
+                    client.queue.get(), settings.SSE_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                message = HEARTBEAT
+            client.writer.write(message)
+            try:
+                await client.writer.drain()
+            except ConnectionError:
+                return
+
+    def _parse(self, head):
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, _ = lines[0].split(' ', 2)
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    def _response_head(self, origin):
+        lines = [
+            'HTTP/1.1 200 OK',
+            'Content-Type: text/event-stream',
+            'Cache-Control: no-cache',
+            'X-Accel-Buffering: no',
+        ]
+        if origin and urlsplit(origin).hostname in settings.ALLOWED_HOSTS:
+            lines += [
+                f'Access-Control-Allow-Origin: {origin}',
+                'Access-Control-Allow-Credentials: true',
+            ]
+        return ('\r\n'.join(lines) + '\r\n\r\nretry: 5000\n\n').encode()
+
+    def _reject(self, writer, status):
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Length: 0\r\n\r\n'.encode()
+        )
+        writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.poll())
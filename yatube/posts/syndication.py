@@ -0,0 +1,355 @@
+from bisect import bisect_left
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import DeletionJob, Group, Post, User
+
+# Поколение всех кэшей лент и карт сайта; reset() сбрасывает их разом.
+VERSION_KEY = 'syndication:version'
+
+
+def _key(name):
+    return f'{name}:{cache.get(VERSION_KEY, 0)}'
+
+
+def reset():
+    """Сбрасывает все ленты и карты сайта, например после импорта."""
+    cache.add(VERSION_KEY, 0, None)
+    cache.incr(VERSION_KEY)
+
+
+def forget(post, group_ids=(), dates=()):
+    """Сбрасывает ленты и карту месяца, в которые попадал пост.
+
+    Новые посты кэши находят сами по водяному знаку, а правку,
+    удаление или снятие с публикации не замечают. group_ids и dates —
+    прежние группа и дата поста, если они изменились.
+    """
+    names = ['feed:index', 'sitemap:months', f'feed:author:{post.author_id}']
+    names += [
+        f'feed:group:{group_id}'
+        for group_id in {post.group_id, *group_ids} if group_id
+    ]
+    for date in {post.pub_date, *dates}:
+        date = timezone.localtime(date)
+        names.append(f'sitemap:posts:{date.year}-{date.month}')
+    cache.delete_many([_key(name) for name in names])
+
+
+def _fresh(queryset, watermark, seen):
+    """(pk, pub_date) постов queryset, которые кэш еще не учел.
+
+    Водяной знак — наибольший учтенный pk. Пост получает pk при
+    вставке, а виден становится после фиксации транзакции, поэтому
+    пост с меньшим pk может появиться позже большего: каждый раз
+    перечитываются и SYNDICATION_OVERLAP id перед знаком, а уже учтенные
+    из них лежат в seen.
+    """
+    since = max(watermark - settings.SYNDICATION_OVERLAP, 0)
+    return [
+        row
+        for row in queryset.filter(pk__gt=since).order_by().values_list(
+            'pk', 'pub_date'
+        )
+        if row[0] not in seen
+    ]
+
+
+def _advance(watermark, seen, pks):
+    """Водяной знак и seen после того, как кэш учел посты pks."""
+    watermark = max([watermark, *pks])
+    since = watermark - settings.SYNDICATION_OVERLAP
+    return watermark, frozenset(pk for pk in (*seen, *pks) if pk > since)
+
+
+def _feed_items(name, queryset, limit):
+    """Записи limit последних постов queryset, от новых к старым.
+
+    В кэше хранятся (водяной знак, seen, записи); из базы целиком
+    читаются только посты, которых кэш еще не учел. Правку, удаление
+    или снятие с публикации водяной знак не замечает: такие посты
+    сбрасывают кэш через forget().
+    """
+    key = _key(name)
+    state = cache.get(key)
+    if state is None:
+        posts = list(
+            queryset.select_related('author').order_by('-pub_date')[:limit]
+        )
+        watermark, seen = _advance(0, (), [post.pk for post in posts])
+        items = [_post_item(post) for post in posts]
+    else:
+        watermark, seen, items = state
+        new = [pk for pk, _ in _fresh(queryset, watermark, seen)]
+        if not new:
+            return items
+        posts = queryset.filter(pk__in=new).select_related(
+            'author'
+        ).order_by('-pub_date')[:limit]
+        items = sorted(
+            [*map(_post_item, posts), *items],
+            key=lambda item: item['pub_date'],
+            reverse=True,
+        )[:limit]
+        watermark, seen = _advance(watermark, seen, new)
+    cache.set(
+        key, (watermark, seen, items), settings.SYNDICATION_CACHE_TIME
+    )
+    return items
+
+
+def _post_item(post):
+    return {
+        'location': reverse('posts:post_detail', args=(post.id, )),
+        'title': post.text[:50],
+        'text': post.text,
+        'author': post.author.get_full_name() or post.author.username,
+        'pub_date': post.pub_date,
+    }
+
+
+def _month_bounds(year, month):
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def _month_stats(posts, year, month):
+    start, end = _month_bounds(year, month)
+    return posts.filter(pub_date__gte=start, pub_date__lt=end).aggregate(
+        lastmod=Max('pub_date'), count=Count('id'), top=Max('id')
+    )
+
+
+def _months():
+    """Месяцы с постами: время последнего поста и число постов.
+
+    Месяцы, в которые попали еще не учтенные посты, пересчитываются
+    целиком.
+    """
+    cache_key = _key('sitemap:months')
+    posts = Post.objects.published()
+    state = cache.get(cache_key)
+    if state is None:
+        watermark, months = 0, {}
+        for month in posts.dates('pub_date', 'month'):
+            stats = _month_stats(posts, month.year, month.month)
+            watermark = max(watermark, stats.pop('top'))
+            months[(month.year, month.month)] = stats
+        seen = frozenset(posts.filter(
+            pk__gt=watermark - settings.SYNDICATION_OVERLAP
+        ).values_list('pk', flat=True))
+    else:
+        watermark, seen, months = state
+        rows = _fresh(posts, watermark, seen)
+        if not rows:
+            return months
+        for year, month in {
+            (date.year, date.month)
+            for date in (timezone.localtime(date) for _, date in rows)
+        }:
+            stats = _month_stats(posts, year, month)
+            del stats['top']
+            if stats['count']:
+                months[(year, month)] = stats
+            else:
+                months.pop((year, month), None)
+        watermark, seen = _advance(watermark, seen, [pk for pk, _ in rows])
+    cache.set(
+        cache_key,
+        (watermark, seen, months),
+        settings.SYNDICATION_CACHE_TIME,
+    )
+    return months
+
+
+def _month_entries(year, month):
+    """(pk, время публикации в секундах) постов месяца по возрастанию pk.
+
+    Для карты сайта хватает адреса и даты, поэтому кэш хранит только
+    их, кусками по SYNDICATION_CHUNK_SIZE записей: даже месяц на
+    десятки тысяч постов не упирается в предел размера значения
+    memcached. Новые посты дописываются в последние куски.
+    """
+    name = f'sitemap:posts:{year}-{month}'
+    start, end = _month_bounds(year, month)
+    size = settings.SYNDICATION_CHUNK_SIZE
+    watermark, seen, count = cache.get(_key(name), (0, frozenset(), 0))
+    keys = [_key(f'{name}:{index}') for index in range(count)]
+    chunks = cache.get_many(keys)
+    if len(chunks) < count:
+        # Кусок вытеснен из кэша: месяц собирается заново.
+        watermark, seen, keys = 0, frozenset(), []
+    entries = [entry for key in keys for entry in chunks[key]]
+    rows = _fresh(
+        Post.objects.published().filter(
+            pub_date__gte=start, pub_date__lt=end
+        ),
+        watermark,
+        seen,
+    )
+    if not rows:
+        return entries
+    first = min(pk for pk, _ in rows)
+    changed = bisect_left(entries, (first, )) // size * size
+    entries = sorted(
+        entries + [(pk, int(date.timestamp())) for pk, date in rows]
+    )
+    watermark, seen = _advance(watermark, seen, [pk for pk, _ in rows])
+    cache.set_many(
+        {
+            _key(f'{name}:{index // size}'): entries[index:index + size]
+            for index in range(changed, len(entries), size)
+        },
+        settings.SYNDICATION_CACHE_TIME,
+    )
+    cache.set(
+        _key(name),
+        (watermark, seen, (len(entries) - 1) // size + 1),
+        settings.SYNDICATION_CACHE_TIME,
+    )
+    return entries
+
+
+def sitemap_index(request):
+    """Индекс карт сайта: карты постов по месяцам и карта групп."""
+    limit = settings.SITEMAP_LIMIT
+    sitemaps = []
+    for (year, month), section in sorted(_months().items()):
+        location = request.build_absolute_uri(
+            reverse('posts:sitemap_posts', args=(year, month))
+        )
+        pages = (section['count'] - 1) // limit + 1
+        for page in range(1, pages + 1):
+            sitemaps.append({
+                'location': location if page == 1 else f'{location}?p={page}',
+                'lastmod': section['lastmod'],
+            })
+    sitemaps.append({
+        'location': request.build_absolute_uri(
+            reverse('posts:sitemap_groups')
+        ),
+        'lastmod': None,
+    })
+    return render(
+        request,
+        'sitemaps/index.xml',
+        {'sitemaps': sitemaps},
+        content_type='application/xml',
+    )
+
+
+def sitemap_posts(request, year, month):
+    """Карта постов за месяц, при необходимости разбитая на страницы."""
+    if not 1 <= month <= 12:
+        raise Http404
+    page = request.GET.get('p', '1')
+    page = int(page) if page.isdigit() else 1
+    limit = settings.SITEMAP_LIMIT
+    entries = _month_entries(year, month)[(page - 1) * limit:page * limit]
+    if not entries:
+        raise Http404
+    # reverse() на каждую из десятков тысяч записей заметно медленнее.
+    prefix, suffix = reverse('posts:post_detail', args=(0, )).rsplit('0', 1)
+    return _urlset(request, [
+        {
+            'location': f'{prefix}{pk}{suffix}',
+            'lastmod': datetime.fromtimestamp(published, timezone.utc),
+        }
+        for pk, published in entries
+    ])
+
+
+def sitemap_groups(request):
+    """Карта страниц групп."""
+    slugs = Group.objects.filter(is_active=True).values_list(
+        'slug', flat=True
+    )
+    return _urlset(request, [
+        {'location': reverse('posts:group_list', args=(slug, ))}
+        for slug in slugs.iterator()
+    ])
+
+
+def _urlset(request, urls):
+    for url in urls:
+        url['location'] = request.build_absolute_uri(url['location'])
+    return render(
+        request,
+        'sitemaps/urlset.xml',
+        {'urls': urls},
+        content_type='application/xml',
+    )
+
+
+def _atom(request, key, title, link, queryset):
+    items = _feed_items(key, queryset, settings.FEED_ITEMS)
+    feed = Atom1Feed(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=title,
+        language=settings.LANGUAGE_CODE,
+        feed_url=request.build_absolute_uri(),
+    )
+    for item in items:
+        url = request.build_absolute_uri(item['location'])
+        feed.add_item(
+            title=item['title'],
+            link=url,
+            unique_id=url,
+            description=item['text'],
+            author_name=item['author'],
+            pubdate=item['pub_date'],
+        )
+    return HttpResponse(
+        feed.writeString('utf-8'), content_type=feed.content_type
+    )
+
+
+def index_feed(request):
+    """Atom-лента последних постов сайта."""
+    return _atom(
+        request,
+        'feed:index',
+        'Последние обновления на сайте',
+        reverse('posts:index'),
+        Post.objects.published(),
+    )
+
+
+def group_feed(request, slug):
+    """Atom-лента группы."""
+    group = get_object_or_404(Group, slug=slug, is_active=True)
+    return _atom(
+        request,
+        f'feed:group:{group.id}',
+        f'Записи сообщества {group.title}',
+        reverse('posts:group_list', args=(slug, )),
+        group.posts.published(),
+    )
+
+
+def profile_feed(request, username):
+    """Atom-лента автора."""
+    author = get_object_or_404(
+        User.objects.exclude(pk__in=DeletionJob.pending(DeletionJob.USER)),
+        username=username,
+    )
+    return _atom(
+        request,
+        f'feed:author:{author.id}',
+        f'Посты пользователя {author.get_full_name() or author.username}',
+        reverse('posts:profile', args=(username, )),
+        author.posts.published(),
+    )
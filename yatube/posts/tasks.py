@@ -0,0 +1,58 @@
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import enqueue, task
+from . import deletion, export, images, notifications
+from .models import DeletionJob, Post, User
+
+# Миниатюры, которые выводят шаблоны постов.
+THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+@task('posts.run_deletion')
+def run_deletion(job_id):
+    """Удаляет одну пачку и ставит в очередь следующую."""
+    job = DeletionJob.objects.filter(pk=job_id, finished=None).first()
+    if job is not None and not deletion.step(
+        job, settings.DELETION_CHUNK_SIZE
+    ):
+        enqueue('posts.run_deletion', job_id)
+
+
+@task('posts.write_export')
+def write_export(user_id):
+    """Собирает архив, который затем отдает страница выгрузки."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        export.write_export(user)
+
+
+@task('posts.process_image', max_attempts=5)
+def process_image(post_id, name, digest, source):
+    images.process(post_id, name, digest, source)
+
+
+@task('posts.release_image')
+def release_image(name):
+    images.release_now(name)
+
+
+@task('posts.make_thumbnails')
+def make_thumbnails(post_id):
+    """Заранее нарезает миниатюры, чтобы их не делал первый просмотр."""
+    post = Post.objects.filter(pk=post_id).exclude(image='').first()
+    if post is not None:
+        for geometry, options in THUMBNAILS:
+            get_thumbnail(post.image, geometry, **options)
+
+
+@task('posts.notify_followers')
+def notify_followers(post_id):
+    notifications.fan_out(post_id)
+
+
+@task('posts.send_digests')
+def send_digests():
+    notifications.send_digests(settings.NOTIFY_BATCH_SIZE)
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import authors
+from posts.models import Comment, Follow, Post, User
+
+
+class AuthorCardTest(TestCase):
+    """Проверка кэшированных карточек авторов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_are_built_in_bulk_and_cached(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(6):
+            cards = authors.cards([self.author.id, self.reader.id, 0])
+        self.assertEqual(set(cards), {self.author.id, self.reader.id})
+        card = cards[self.author.id]
+        self.assertEqual(card.display_name, 'Лев Толстой')
+        self.assertEqual(card.posts_count, 1)
+        self.assertEqual(card.followers_count, 1)
+        self.assertEqual(card.last_activity, self.post.pub_date)
+        self.assertEqual(cards[self.reader.id].display_name, 'reader')
+        self.assertEqual(cards[self.reader.id].following_count, 1)
+        with self.assertNumQueries(0):
+            authors.cards([self.author.id, self.reader.id])
+
+    def test_writes_invalidate_cards(self):
+        self.assertEqual(authors.card(self.author.id).posts_count, 1)
+        Post.objects.create(text='Еще пост', author=self.author)
+        self.assertEqual(authors.card(self.author.id).posts_count, 2)
+
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(authors.card(self.author.id).followers_count, 1)
+        self.assertEqual(authors.card(self.reader.id).following_count, 1)
+
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertEqual(
+            authors.card(self.reader.id).last_activity, comment.pub_date
+        )
+
+        self.reader.first_name = 'Иван'
+        self.reader.save()
+        self.assertEqual(authors.card(self.reader.id).display_name, 'Иван')
+
+    def test_post_detail_decorates_comment_authors(self):
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id, ))
+        )
+        comment, = response.context['post_comments']
+        self.assertEqual(comment.author_card.username, 'reader')
+        self.assertEqual(response.context['card'].display_name, 'Лев Толстой')
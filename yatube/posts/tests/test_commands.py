@@ -0,0 +1,178 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.paginator import versions
+from posts.models import Follow, Group, Post, Recommendation, User
+
+
+@override_settings(SHARED_CACHE=True)
+class WarmCacheCommandTest(TestCase):
+    """Проверка команды прогрева кэша."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_cache_fills_feed_fragments(self):
+        """Команда кладет в кэш первые страницы групп и авторов."""
+        out = StringIO()
+        call_command(
+            'warm_cache', pages=1, authors=1, workers=1, stdout=out
+        )
+        fragments = (
+            make_template_fragment_key('index_page', [None]),
+            make_template_fragment_key('group_page', [
+                WarmCacheCommandTest.group.slug, 1,
+                versions(f'group:{WarmCacheCommandTest.group.id}'),
+            ]),
+            make_template_fragment_key('profile_page', [
+                WarmCacheCommandTest.user.username, 1,
+                versions(f'author:{WarmCacheCommandTest.user.id}'),
+            ]),
+        )
+        for key in fragments:
+            with self.subTest(key=key):
+                self.assertIsNotNone(cache.get(key))
+        self.assertIn('Прогрето страниц: 3', out.getvalue())
+
+    @override_settings(SHARED_CACHE=False)
+    def test_warm_cache_requires_shared_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('warm_cache', stdout=StringIO())
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ShardMediaCommandTest(TestCase):
+    """Проверка переноса картинок в каталоги по хэшу."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_flat_images_are_moved(self):
+        """Старые файлы переносятся, ссылки постов переписываются."""
+        flat = FileSystemStorage()
+        name = flat.save('posts/old.gif', ContentFile(b'GIF89a'))
+        posts = [
+            Post.objects.create(text=text, author=self.user, image=name)
+            for text in ('Первый', 'Второй')
+        ]
+        out = StringIO()
+        call_command('shard_media', batch_size=1, stdout=out)
+        storage = Post.image.field.storage
+        for post in posts:
+            post.refresh_from_db()
+            self.assertTrue(storage.is_sharded(post.image.name))
+            self.assertTrue(storage.exists(post.image.name))
+        self.assertFalse(flat.exists(name))
+        self.assertIn('Перенесено картинок: 2', out.getvalue())
+
+
+@override_settings(
+    FOLLOW_GRAPH_PATH=f'{TEMP_MEDIA_ROOT}/graph/follow_graph.pickle'
+)
+class BuildRecommendationsCommandTest(TestCase):
+    """Проверка пересчета рекомендаций подписок."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.writer, cls.other = (
+            User.objects.create_user(username=username)
+            for username in ('reader', 'friend', 'writer', 'other')
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.writer)
+
+    def recommended(self, user):
+        return list(
+            Recommendation.objects.filter(user=user).values_list(
+                'author__username', flat=True
+            )
+        )
+
+    def test_friends_of_friends(self):
+        """Пользователю предлагают авторов, которых читают его авторы."""
+        call_command('build_recommendations', full=True, stdout=StringIO())
+        self.assertEqual(self.recommended(self.reader), ['writer'])
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [user.username for user in response.context['suggestions']],
+            ['writer'],
+        )
+
+    def test_incremental_run_updates_affected_users(self):
+        call_command('build_recommendations', full=True, stdout=StringIO())
+        Follow.objects.create(user=self.friend, author=self.other)
+        out = StringIO()
+        call_command('build_recommendations', stdout=out)
+        self.assertEqual(
+            sorted(self.recommended(self.reader)), ['other', 'writer']
+        )
+        self.assertIn('пересчитано пользователей: 2', out.getvalue())
+
+    def test_new_follower_updates_co_followers(self):
+        """Новый подписчик автора меняет похожих для его подписчиков."""
+        call_command('build_recommendations', full=True, stdout=StringIO())
+        Follow.objects.create(user=self.other, author=self.friend)
+        out = StringIO()
+        call_command('build_recommendations', stdout=out)
+        self.assertIn('пересчитано пользователей: 2', out.getvalue())
+
+    def test_full_run_is_repeated_periodically(self):
+        call_command('build_recommendations', full=True, stdout=StringIO())
+        out = StringIO()
+        call_command('build_recommendations', stdout=out)
+        self.assertIn('пересчитано пользователей: 0', out.getvalue())
+        marker = f'{settings.FOLLOW_GRAPH_PATH}.full'
+        old = time.time() - settings.RECOMMENDATIONS_FULL_INTERVAL - 1
+        os.utime(marker, (old, old))
+        out = StringIO()
+        call_command('build_recommendations', stdout=out)
+        self.assertIn('пересчитано пользователей: 2', out.getvalue())
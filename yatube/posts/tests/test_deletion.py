@@ -0,0 +1,124 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from posts import deletion
+from posts.models import Comment, Follow, Group, GroupStats, Post, User
+
+
+class DeletionTest(TestCase):
+    """Проверка фонового удаления пользователей и групп."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=self.author, group=self.group
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_user_is_hidden_then_purged(self):
+        """Пользователь скрывается сразу, записи удаляются пачками."""
+        job = deletion.schedule(self.author)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:profile', args=(self.author.username, ))
+            ).status_code,
+            404,
+        )
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'Пост 0'
+        )
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 3)
+
+        deletion.run(job, chunk_size=1)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(job.processed, 8)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_deactivated_user_stays_visible(self):
+        """Снятый is_active без удаления не скрывает посты и профиль."""
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:profile', args=(self.author.username, ))
+            ).status_code,
+            200,
+        )
+        self.assertContains(self.client.get(reverse('posts:index')), 'Пост 0')
+
+    def test_posts_are_deleted_without_signals(self):
+        """Пачка постов удаляется без сигналов, сводка группы верна."""
+        other = Post.objects.create(
+            text='Чужой пост', author=self.reader, group=self.group
+        )
+        job = deletion.schedule(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            deletion.run(job, chunk_size=10)
+        deletes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_post"')
+        ]
+        self.assertEqual(len(deletes), 1)
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.latest_post_id, other.pk)
+
+    def test_group_posts_are_unlinked(self):
+        job = deletion.schedule(self.group)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:group_list', args=(self.group.slug, ))
+            ).status_code,
+            404,
+        )
+        deletion.run(job, chunk_size=2)
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 3)
+
+    def test_schedule_queues_background_task(self):
+        job = deletion.schedule(self.group)
+        deletion.schedule(self.group)
+        self.assertEqual(
+            Task.objects.filter(name='posts.run_deletion').count(), 1
+        )
+        call_command(
+            'run_tasks', '--once', '--processes', '1',
+            stdout=io.StringIO(),
+        )
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished)
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(DELETION_CHUNK_SIZE=1)
+    def test_task_deletes_one_chunk_per_run(self):
+        """Каждый запуск задачи удаляет одну пачку и ставит следующую."""
+        job = deletion.schedule(self.author)
+        runs = 0
+        while tasks.work('test', 1):
+            runs += 1
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished)
+        self.assertGreater(runs, 3)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
@@ -0,0 +1,136 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.models import Task
+from posts.models import Comment, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_EXPORT_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, EXPORT_ROOT=TEMP_EXPORT_ROOT)
+class ProfileExportTest(TestCase):
+    """Проверка выгрузки данных пользователя."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='small.gif', content=b'GIF89a', content_type='image/gif'
+            ),
+        )
+        Post.objects.create(
+            text='Чужой пост',
+            author=User.objects.create_user(username='other'),
+        )
+        Comment.objects.create(
+            text='Тестовый комментарий', author=cls.user, post=cls.post
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_EXPORT_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_EXPORT_ROOT, ignore_errors=True)
+        self.client = Client()
+        self.client.force_login(ProfileExportTest.user)
+
+    def _archive(self, response):
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return zipfile.ZipFile(io.BytesIO(content))
+
+    def test_export_streams_user_data(self):
+        """Архив содержит только посты, комментарии и картинки автора."""
+        response = self.client.get(reverse('posts:profile_export'))
+        self.assertTrue(response.streaming)
+        archive = self._archive(response)
+
+        posts = archive.read('posts.jsonl').decode().splitlines()
+        self.assertEqual(len(posts), 1)
+        self.assertEqual(json.loads(posts[0])['text'], 'Тестовый текст')
+        comment = json.loads(archive.read('comments.jsonl'))
+        self.assertEqual(comment['post'], ProfileExportTest.post.id)
+        self.assertEqual(
+            archive.read(f'images/{ProfileExportTest.post.image.name}'),
+            b'GIF89a',
+        )
+
+    def test_shared_image_is_exported_once(self):
+        """Картинка, общая для двух постов, попадает в архив один раз."""
+        Post.objects.create(
+            text='Тот же файл',
+            author=ProfileExportTest.user,
+            image=ProfileExportTest.post.image.name,
+        )
+        archive = self._archive(
+            self.client.get(reverse('posts:profile_export'))
+        )
+        names = archive.namelist()
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_streamed_export_queues_build(self):
+        """Потоковая выгрузка один раз ставит сборку архива в очередь,
+        после нее отдается готовый архив."""
+        for _ in range(2):
+            b''.join(self.client.get(
+                reverse('posts:profile_export')
+            ).streaming_content)
+        self.assertEqual(
+            Task.objects.filter(name='posts.write_export').count(), 1
+        )
+        while tasks.work('test', 10):
+            pass
+        response = self.client.get(reverse('posts:profile_export'))
+        self.assertEqual(
+            self._archive(response).read('comments.jsonl').count(b'\n'), 1
+        )
+        self.assertFalse(Task.objects.exists())
+
+    def test_prepared_export_is_served(self):
+        """Архив, собранный командой, отдается вместо потоковой выгрузки."""
+        call_command('export_user_data', 'author', stdout=io.StringIO())
+        response = self.client.get(reverse('posts:profile_export'))
+        self.assertEqual(
+            self._archive(response).read('comments.jsonl').count(b'\n'), 1
+        )
+
+    def test_prepared_export_discarded_on_change(self):
+        """После нового комментария архив снова собирается потоком."""
+        call_command('export_user_data', 'author', stdout=io.StringIO())
+        Comment.objects.create(
+            text='Свежий комментарий',
+            author=ProfileExportTest.user,
+            post=ProfileExportTest.post,
+        )
+        response = self.client.get(reverse('posts:profile_export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            self._archive(response).read('comments.jsonl').count(b'\n'), 2
+        )
+
+    def test_export_requires_login(self):
+        response = Client().get(reverse('posts:profile_export'))
+        self.assertRedirects(
+            response,
+            f'{reverse("auth:login")}?next={reverse("posts:profile_export")}'
+        )
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import follows
+from posts.models import Follow, User
+
+
+class FollowCacheTest(TestCase):
+    """Проверка кэша подписок пользователя."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        Follow.objects.create(user=self.user, author=self.authors[0])
+
+    def test_page_of_authors_in_one_lookup(self):
+        """Подписки на всех авторов страницы проверяются без запросов."""
+        follows.followed_ids(self.user.id)
+        ids = [author.id for author in self.authors]
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                follows.followed_among(self.user.id, ids), {ids[0]}
+            )
+            self.assertTrue(follows.is_following(self.user.id, ids[0]))
+            self.assertFalse(follows.is_following(self.user.id, ids[1]))
+
+    def test_follow_and_unfollow_invalidate(self):
+        author = self.authors[1]
+        self.assertFalse(follows.is_following(self.user.id, author.id))
+        follow = Follow.objects.create(user=self.user, author=author)
+        self.assertTrue(follows.is_following(self.user.id, author.id))
+        follow.delete()
+        self.assertFalse(follows.is_following(self.user.id, author.id))
+
+    def test_views_do_not_trust_cached_follows(self):
+        """Подписка и отписка пишут в базу, даже если кэш устарел."""
+        author = self.authors[0]
+        client = Client()
+        client.force_login(self.user)
+        unfollow = reverse('posts:profile_unfollow', args=(author.username, ))
+        follow = reverse('posts:profile_follow', args=(author.username, ))
+
+        # update() не вызывает сигналы: в кэше остается подписка на
+        # другого автора, а в базе — на author.
+        Follow.objects.filter(user=self.user).update(author=self.authors[2])
+        follows.invalidate(self.user.id)
+        follows.followed_ids(self.user.id)
+        Follow.objects.filter(user=self.user).update(author=author)
+        client.get(unfollow)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+        client.get(follow)
+        client.get(follow)
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=author).count(), 1
+        )
@@ -11,7 +11,7 @@ from posts.models import Comment, Post, Group, User
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_PROCESSING_INLINE=True)
 class PostFormsTest(TestCase):
     """Проверка forms."""
 
@@ -80,7 +80,8 @@ class PostFormsTest(TestCase):
             Post.objects.filter(
                 text=changed_text,
                 group=PostFormsTest.group,
-                image='posts/small.gif'
+                image__startswith='posts/',
+                image__endswith='.gif',
             ).exists()
         )
         self.assertRedirects(response, redirect_path)
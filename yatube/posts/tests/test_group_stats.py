@@ -0,0 +1,124 @@
+import io
+from datetime import timedelta
+from importlib import import_module
+
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import group_stats
+from posts.models import Group, GroupStats, Post, User
+
+
+class GroupStatsTest(TestCase):
+    """Проверка сводки по группам и страницы со списком групп."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_post_save_and_delete_update_stats(self):
+        first = Post.objects.create(
+            text='Первый', author=self.user, group=self.group
+        )
+        second = Post.objects.create(
+            text='Второй', author=self.user, group=self.group
+        )
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.latest_post_id, second.id)
+        self.assertEqual(group_stats.week_posts(stats), 2)
+
+        second.delete()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.latest_post_id, first.id)
+        self.assertEqual(group_stats.week_posts(stats), 1)
+
+    def test_moving_and_unpublishing_post(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group
+        )
+        post.group = self.other
+        post.save()
+        self.assertEqual(self.stats(self.group).post_count, 0)
+        self.assertIsNone(self.stats(self.group).latest_post_id)
+        self.assertEqual(self.stats(self.other).latest_post_id, post.id)
+
+        post.is_published = False
+        post.save()
+        self.assertEqual(self.stats(self.other).post_count, 0)
+
+    def test_daily_counts_shift_with_date(self):
+        stats = GroupStats(
+            daily_posts='3,2,1,0,0,0,1',
+            daily_date=timezone.localdate() - timedelta(days=2),
+        )
+        self.assertEqual(
+            group_stats.daily_counts(stats, timezone.localdate()),
+            [0, 0, 3, 2, 1, 0, 0],
+        )
+
+    def test_rebuild_command_matches_incremental(self):
+        Post.objects.create(text='Новый', author=self.user, group=self.group)
+        old = Post.objects.create(
+            text='Старый', author=self.user, group=self.group
+        )
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        GroupStats.objects.all().delete()
+        call_command('rebuild_group_stats', stdout=io.StringIO())
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(group_stats.week_posts(stats), 1)
+        self.assertEqual(self.stats(self.other).post_count, 0)
+
+    def test_migration_backfills_existing_posts(self):
+        """Миграция считает сводки по постам, созданным до нее."""
+        Post.objects.create(text='Пост', author=self.user, group=self.group)
+        GroupStats.objects.all().delete()
+        migration = import_module(
+            'posts.migrations.0022_backfill_groupstats'
+        )
+        migration.backfill_group_stats(apps, None)
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(group_stats.week_posts(stats), 1)
+        self.assertIsNotNone(stats.latest_post_id)
+
+    def test_group_index_page_and_json(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, group=self.group
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:group_index_json'))
+        groups = response.json()['groups']
+        self.assertEqual(
+            [group['slug'] for group in groups], ['test-slug', 'other-slug']
+        )
+        self.assertEqual(groups[0]['post_count'], 1)
+        self.assertEqual(groups[0]['latest_post'], post.id)
+        self.assertEqual(groups[0]['week_posts'], 1)
+
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertContains(response, 'Тестовая группа')
+        self.assertContains(
+            response, reverse('posts:post_detail', args=(post.id, ))
+        )
@@ -0,0 +1,250 @@
+import base64
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import get_thumbnail
+
+from core import tasks
+from posts import images
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_with_orientation(size=(4, 2)):
+    """JPEG с EXIF-тегом поворота на 90 градусов."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    content = io.BytesIO()
+    Image.new('RGB', size, 'red').save(content, 'JPEG', exif=exif)
+    return SimpleUploadedFile(
+        'photo.jpg', content.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_PROCESSING_DIR=os.path.join(TEMP_MEDIA_ROOT, 'uploads'),
+    IMAGE_PROCESSING_INLINE=True,
+)
+class ImageProcessingTest(TestCase):
+    """Проверка обработки загруженных картинок."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def test_image_is_rotated_and_stripped(self):
+        """Картинка поворачивается по EXIF и сохраняется без метаданных."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с фото', 'image': jpeg_with_orientation()},
+        )
+        post = Post.objects.get(text='Пост с фото')
+        self.assertTrue(post.is_published)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (2, 4))
+            self.assertNotIn(0x0112, image.getexif())
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=10)
+    def test_oversized_upload_is_rejected(self):
+        response = self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Большой файл', 'image': jpeg_with_orientation()},
+        )
+        self.assertTrue(response.context['form'].has_error('image'))
+        self.assertFalse(Post.objects.filter(text='Большой файл').exists())
+
+    @override_settings(MAX_IMAGE_PIXELS=4)
+    def test_pixel_limit(self):
+        response = self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Много пикселей', 'image': jpeg_with_orientation()},
+        )
+        self.assertTrue(response.context['form'].has_error('image'))
+
+    @override_settings(IMAGE_PROCESSING_INLINE=False)
+    def test_upload_is_processed_by_task_queue(self):
+        """Загрузка ждет обработчика задач и публикуется после него."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с фото', 'image': jpeg_with_orientation()},
+        )
+        post = Post.objects.get(text='Пост с фото')
+        self.assertFalse(post.is_published)
+        self.assertEqual(tasks.work('test', 10), 1)
+        post.refresh_from_db()
+        self.assertTrue(post.is_published)
+        self.assertTrue(post.image)
+
+    def test_broken_upload_is_reported_to_author(self):
+        """Битый файл не публикует пост, автор видит ошибку."""
+        post = Post.objects.create(
+            text='Битая картинка', author=self.user, is_published=False
+        )
+        os.makedirs(settings.IMAGE_PROCESSING_DIR, exist_ok=True)
+        source = os.path.join(settings.IMAGE_PROCESSING_DIR, 'broken')
+        with open(source, 'wb') as upload:
+            upload.write(b'not an image')
+        images.process(post.pk, 'broken', 'digest', source)
+
+        post.refresh_from_db()
+        self.assertFalse(post.is_published)
+        self.assertEqual(post.image_error, images.IMAGE_ERROR)
+        self.assertFalse(os.path.exists(source))
+        response = self.client.get(
+            reverse('posts:profile', args=(self.user.username, ))
+        )
+        self.assertContains(response, images.IMAGE_ERROR)
+
+    def test_unpublished_post_is_hidden(self):
+        """Пост до окончания обработки виден только автору."""
+        post = Post.objects.create(
+            text='В обработке', author=self.user, is_published=False
+        )
+        self.assertNotContains(
+            self.client.get(reverse('posts:index')), 'В обработке'
+        )
+        detail = reverse('posts:post_detail', args=(post.id, ))
+        self.assertEqual(self.client.get(detail).status_code, 200)
+        self.assertEqual(Client().get(detail).status_code, 404)
+
+    def test_media_of_unpublished_post_is_private(self):
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с фото', 'image': jpeg_with_orientation()},
+        )
+        post = Post.objects.get(text='Пост с фото')
+        url = post.image.url
+        self.assertEqual(Client().get(url).status_code, 200)
+
+        Post.objects.filter(pk=post.pk).update(is_published=False)
+        self.assertEqual(Client().get(url).status_code, 404)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        # Дочитываем ответ: клиент сам закроет файл, не трогая соединение
+        # с базой внутри транзакции теста.
+        b''.join(response.streaming_content)
+
+    def test_thumbnails_follow_image_visibility(self):
+        """Миниатюра закрыта вместе с картинкой неопубликованного поста."""
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с фото', 'image': jpeg_with_orientation()},
+        )
+        post = Post.objects.get(text='Пост с фото')
+        url = get_thumbnail(post.image, '2x2').url
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 200)
+        b''.join(response.streaming_content)
+
+        Post.objects.filter(pk=post.pk).update(is_published=False)
+        self.assertEqual(Client().get(url).status_code, 404)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        b''.join(response.streaming_content)
+
+    def test_placeholder_is_stored_and_rendered(self):
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с фото', 'image': jpeg_with_orientation()},
+        )
+        post = Post.objects.get(text='Пост с фото')
+        prefix = 'data:image/jpeg;base64,'
+        self.assertTrue(post.placeholder.startswith(prefix))
+        data = base64.b64decode(post.placeholder[len(prefix):])
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.size, (24, 8))
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, post.placeholder)
+        self.assertContains(response, 'width="960" height="339"')
+
+        Post.objects.update(placeholder='')
+        call_command('build_placeholders', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.placeholder.startswith(prefix))
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_PROCESSING_DIR=os.path.join(TEMP_MEDIA_ROOT, 'uploads'),
+    IMAGE_PROCESSING_INLINE=True,
+)
+class ContentAddressedStorageTest(TransactionTestCase):
+    """Проверка хранения картинок по хэшу содержимого."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def create_post(self, text):
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': text, 'image': jpeg_with_orientation()},
+        )
+        return Post.objects.get(text=text)
+
+    def test_duplicates_share_file(self):
+        """Одинаковые картинки хранятся одним файлом с именем-хэшем."""
+        first = self.create_post('Первый')
+        second = self.create_post('Второй')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name,
+            r'^posts/([0-9a-f]{2})/[0-9a-f]{2}/\1[0-9a-f]{62}\.jpg$',
+        )
+
+    @override_settings(MEDIA_RELEASE_DELAY=0)
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_post('Первый')
+        second = self.create_post('Второй')
+        storage = Post.image.field.storage
+        first.delete()
+        tasks.work('test', 10)
+        self.assertTrue(storage.exists(second.image.name))
+        second.delete()
+        tasks.work('test', 10)
+        self.assertFalse(storage.exists(second.image.name))
+
+    def test_recently_saved_file_is_kept(self):
+        """Файл, сохраненный заново в пределах grace, не удаляется."""
+        post = self.create_post('Первый')
+        name = post.image.name
+        post.delete()
+        storage = Post.image.field.storage
+        self.assertTrue(storage.release(name, Post.objects.all(), grace=60))
+        self.assertTrue(storage.exists(name))
+        self.assertFalse(storage.release(name, Post.objects.all()))
+        self.assertFalse(storage.exists(name))
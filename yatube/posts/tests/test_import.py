@@ -0,0 +1,108 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import authors
+from posts.models import Comment, Group, Post, PostEvent, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsCommandTest(TestCase):
+    """Проверка команды импорта постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir)
+        with open(os.path.join(self.source_dir, 'small.gif'), 'wb') as gif:
+            gif.write(
+                b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21'
+                b'\xF9\x04\x01\x00\x00\x00\x00\x2C\x00\x00\x00\x00\x01\x00'
+                b'\x01\x00\x00\x02\x01\x00\x00\x3B'
+            )
+        self.path = os.path.join(self.source_dir, 'posts.jsonl')
+
+    def _write(self, records):
+        with open(self.path, 'w', encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def _import(self, **options):
+        call_command(
+            'import_posts',
+            self.path,
+            image_root=self.source_dir,
+            stdout=io.StringIO(),
+            **options,
+        )
+
+    def test_import_posts_with_comments_and_images(self):
+        """Посты, комментарии и картинки импортируются с исходными датами."""
+        self._write([
+            {
+                'author': 'author',
+                'text': 'Импортированный пост',
+                'group': 'test-slug',
+                'pub_date': '2020-01-02T03:04:05+00:00',
+                'image': 'small.gif',
+                'comments': [{'author': 'reader', 'text': 'Комментарий'}],
+            },
+            {'author': 'unknown', 'text': 'Пропущенный пост'},
+        ])
+        events = PostEvent.objects.count()
+        self._import(create_authors=False)
+
+        post = Post.objects.get(text='Импортированный пост')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertFalse(Post.objects.filter(author__username='unknown'))
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(PostEvent.objects.count(), events)
+
+    def test_import_creates_authors_and_resumes(self):
+        """Импорт создает авторов и продолжается с сохраненной строки."""
+        self._write([
+            {'author': f'user-{number}', 'text': f'Пост {number}'}
+            for number in range(5)
+        ])
+        with open(f'{self.path}.state', 'w') as state:
+            json.dump({'rows': 3}, state)
+        self._import(create_authors=True, batch_size=1)
+
+        self.assertEqual(
+            set(Post.objects.values_list('text', flat=True)),
+            {'Пост 3', 'Пост 4'},
+        )
+        self.assertFalse(os.path.exists(f'{self.path}.state'))
+
+    def test_import_refreshes_author_cards(self):
+        """Счетчики в закэшированной карточке автора обновляются."""
+        cache.clear()
+        self.assertEqual(authors.card(self.user.id).posts_count, 0)
+        self._write([{'author': 'author', 'text': 'Импортированный пост'}])
+        self._import(create_authors=False)
+        self.assertEqual(authors.card(self.user.id).posts_count, 1)
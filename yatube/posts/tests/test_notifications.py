@@ -0,0 +1,76 @@
+import io
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import tasks
+from posts import notifications
+from posts.models import Follow, Notification, Post, User
+
+
+class NotificationDigestTest(TestCase):
+    """Проверка уведомлений подписчиков о новых постах."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.other = User.objects.create_user(username='other')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader{number}', email=f'reader{number}@test.ru'
+            )
+            for number in range(3)
+        ]
+        cls.silent = User.objects.create_user(username='silent')
+        for reader in cls.readers + [cls.silent]:
+            Follow.objects.create(user=reader, author=cls.author)
+        Follow.objects.create(user=cls.readers[0], author=cls.other)
+
+    def publish(self, author, text):
+        post = Post.objects.create(text=text, author=author)
+        tasks.work('test', batch_size=10)
+        return post
+
+    def test_new_post_is_fanned_out_to_followers_with_email(self):
+        post = self.publish(self.author, 'Война и мир')
+        self.assertEqual(
+            set(Notification.objects.filter(post=post).values_list(
+                'recipient_id', flat=True
+            )),
+            {reader.id for reader in self.readers},
+        )
+        self.assertEqual(notifications.fan_out(post.id), 3)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_digest_groups_posts_per_recipient(self):
+        self.publish(self.author, 'Война и мир')
+        self.publish(self.author, 'Анна Каренина')
+        self.publish(self.other, 'Чужой пост')
+        # По три запроса на каждую из двух пачек и пустая выборка.
+        with self.assertNumQueries(7):
+            sent = notifications.send_digests(batch_size=2)
+        self.assertEqual(sent, 3)
+        self.assertFalse(Notification.objects.exists())
+
+        first = next(
+            message for message in mail.outbox
+            if message.to == ['reader0@test.ru']
+        )
+        self.assertIn('3', first.subject)
+        self.assertIn('Анна Каренина', first.body)
+        self.assertIn('Чужой пост', first.body)
+        self.assertIn('Лев Толстой', first.body)
+        self.assertLess(
+            first.body.index('Анна Каренина'), first.body.index('Война и мир')
+        )
+
+    def test_command_skips_unpublished_posts(self):
+        post = self.publish(self.author, 'Черновик')
+        Post.objects.filter(pk=post.pk).update(is_published=False)
+        call_command('send_digests', stdout=io.StringIO())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(Notification.objects.exists())
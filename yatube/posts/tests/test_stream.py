@@ -0,0 +1,44 @@
+import json
+
+from django.test import TestCase
+
+from posts.models import Post, PostEvent, User
+from posts.stream import (StreamClient, fetch_events, format_message,
+                          latest_event_id)
+
+
+class PostStreamTest(TestCase):
+    """Проверка журнала и сообщений потока новых постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def test_new_post_is_logged(self):
+        """Создание поста попадает в журнал, изменение — нет."""
+        start = latest_event_id()
+        post = Post.objects.create(text='Новый пост', author=self.user)
+        post.text = 'Измененный пост'
+        post.save()
+        self.assertEqual(
+            list(PostEvent.objects.filter(id__gt=start).values_list(
+                'post_id', 'author_id'
+            )),
+            [(post.id, self.user.id)],
+        )
+
+    def test_events_are_filtered_and_rendered(self):
+        """Клиент ленты подписок получает только карточки своих авторов."""
+        start = latest_event_id()
+        Post.objects.create(text='Пост автора', author=self.user)
+        Post.objects.create(text='Пост другого', author=self.other)
+        events = fetch_events(start)
+        client = StreamClient(writer=None, authors={self.user.id})
+
+        message = format_message(client.select(events)).decode()
+        data = json.loads(message.split('data: ', 1)[1])
+        self.assertEqual(data['count'], 1)
+        self.assertIn('Пост автора', data['cards'][0])
+        self.assertEqual(len(StreamClient(writer=None).select(events)), 2)
@@ -0,0 +1,159 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import deletion, syndication
+from posts.models import Group, Post, User
+
+
+class SyndicationTest(TestCase):
+    """Проверка карт сайта и Atom-лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_feeds_include_new_posts(self):
+        """Новый пост дописывается в закэшированные ленты."""
+        feeds = (
+            reverse('posts:index_feed'),
+            reverse('posts:group_feed', args=(self.group.slug, )),
+            reverse('posts:profile_feed', args=(self.user.username, )),
+        )
+        for feed in feeds:
+            self.client.get(feed)
+        Post.objects.create(
+            text='Второй пост', author=self.user, group=self.group
+        )
+        for feed in feeds:
+            with self.subTest(feed=feed):
+                response = self.client.get(feed)
+                self.assertEqual(
+                    response['Content-Type'],
+                    'application/atom+xml; charset=utf-8',
+                )
+                content = response.content.decode()
+                self.assertIn('Первый пост', content)
+                self.assertIn('Второй пост', content)
+
+    @override_settings(FEED_ITEMS=1)
+    def test_feed_is_limited(self):
+        Post.objects.create(text='Второй пост', author=self.user)
+        content = self.client.get(reverse('posts:index_feed')).content
+        self.assertIn('Второй пост', content.decode())
+        self.assertNotIn('Первый пост', content.decode())
+
+    @override_settings(SITEMAP_LIMIT=1)
+    def test_sitemap_is_split_by_month_and_limit(self):
+        """Индекс ссылается на страницы карт постов по месяцам."""
+        self.client.get(reverse('posts:sitemap'))
+        second = Post.objects.create(text='Второй пост', author=self.user)
+        now = timezone.localtime(self.post.pub_date)
+        section = reverse('posts:sitemap_posts', args=(now.year, now.month))
+
+        index = self.client.get(reverse('posts:sitemap')).content.decode()
+        self.assertIn(f'{section}<', index)
+        self.assertIn(f'{section}?p=2<', index)
+        self.assertIn(reverse('posts:sitemap_groups'), index)
+
+        page = self.client.get(section, {'p': 2}).content.decode()
+        self.assertIn(reverse('posts:post_detail', args=(second.id, )), page)
+        self.assertEqual(self.client.get(section, {'p': 3}).status_code, 404)
+
+    def test_late_commit_with_smaller_id_is_found(self):
+        """Пост, зафиксированный позже поста с большим id, не теряется."""
+        Post.objects.create(
+            id=self.post.pk + 10, text='Ранний', author=self.user
+        )
+        now = timezone.localtime(self.post.pub_date)
+        section = reverse('posts:sitemap_posts', args=(now.year, now.month))
+        self.client.get(reverse('posts:index_feed'))
+        self.client.get(reverse('posts:sitemap'))
+        self.client.get(section)
+
+        late = Post.objects.create(
+            id=self.post.pk + 5, text='Опоздавший', author=self.user
+        )
+        # Дата раньше уже учтенных постов: транзакция шла дольше.
+        Post.objects.filter(pk=late.pk).update(pub_date=self.post.pub_date)
+        self.assertIn(
+            'Опоздавший',
+            self.client.get(reverse('posts:index_feed')).content.decode(),
+        )
+        self.assertIn(
+            reverse('posts:post_detail', args=(late.id, )),
+            self.client.get(section).content.decode(),
+        )
+
+    @override_settings(SYNDICATION_CHUNK_SIZE=2)
+    def test_sitemap_cache_is_chunked(self):
+        """Кэш карты месяца хранит только id и даты, по кускам."""
+        now = timezone.localtime(self.post.pub_date)
+        section = reverse('posts:sitemap_posts', args=(now.year, now.month))
+        self.client.get(section)
+        posts = [
+            Post.objects.create(text=f'Пост {index}', author=self.user)
+            for index in range(3)
+        ]
+        content = self.client.get(section).content.decode()
+        for post in posts:
+            self.assertIn(
+                reverse('posts:post_detail', args=(post.id, )), content
+            )
+        name = f'sitemap:posts:{now.year}-{now.month}'
+        self.assertEqual(cache.get(syndication._key(name))[2], 2)
+        chunks = [
+            cache.get(syndication._key(f'{name}:{index}'))
+            for index in range(2)
+        ]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2])
+        self.assertEqual(chunks[0][0], (
+            self.post.pk, int(self.post.pub_date.timestamp())
+        ))
+
+    def test_changed_posts_leave_cached_feeds(self):
+        """Правка и удаление поста сразу видны в лентах и картах сайта."""
+        post = Post.objects.create(
+            text='Старый текст', author=self.user, group=self.group
+        )
+        feed = reverse('posts:group_feed', args=(self.group.slug, ))
+        now = timezone.localtime(post.pub_date)
+        section = reverse('posts:sitemap_posts', args=(now.year, now.month))
+        location = reverse('posts:post_detail', args=(post.id, ))
+        self.client.get(feed)
+        self.client.get(section)
+
+        post.text = 'Новый текст'
+        post.save()
+        content = self.client.get(feed).content.decode()
+        self.assertIn('Новый текст', content)
+        self.assertNotIn('Старый текст', content)
+
+        post.delete()
+        self.assertNotIn('Новый текст', self.client.get(feed).content.decode())
+        self.assertNotIn(location, self.client.get(section).content.decode())
+
+    def test_deleted_author_leaves_feeds(self):
+        self.client.get(reverse('posts:index_feed'))
+        deletion.schedule(self.user)
+        content = self.client.get(reverse('posts:index_feed')).content
+        self.assertNotIn('Первый пост', content.decode())
+
+    def test_sitemap_index_is_cached(self):
+        self.client.get(reverse('posts:sitemap'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:sitemap'))
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import ActivityCounter, Comment, Group, Post, User
+
+
+class TrendingTest(TestCase):
+    """Проверка счетчиков активности и вкладки «Популярное»."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.user)
+        cls.hot = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, times=1):
+        for _ in range(times):
+            Comment.objects.create(post=post, author=self.user, text='+')
+
+    def test_writes_update_counters(self):
+        self.comment(self.hot, 3)
+        self.assertEqual(
+            ActivityCounter.objects.get(
+                kind=ActivityCounter.POST_COMMENTS, object_id=self.hot.id
+            ).count,
+            3,
+        )
+        self.assertTrue(
+            ActivityCounter.objects.filter(
+                kind=ActivityCounter.GROUP_POSTS, object_id=self.group.id
+            ).exists()
+        )
+
+    def test_rollup_ranks_with_decay(self):
+        """Старая активность весит меньше свежей."""
+        self.comment(self.quiet, 3)
+        self.comment(self.hot, 2)
+        ActivityCounter.objects.filter(object_id=self.quiet.id).update(
+            bucket=timezone.now() - timedelta(hours=12)
+        )
+        ranked = trending.rollup()['posts']
+        self.assertEqual(len(ranked), 2)
+        self.assertIn('Обсуждаемый пост', ranked[0])
+
+    def test_tab_reads_rollup_of_another_process(self):
+        """Рейтинг, посчитанный командой, берется из базы."""
+        self.comment(self.hot)
+        trending.rollup()
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:trending'))
+        self.assertContains(response, 'Обсуждаемый пост')
+
+    def test_tab_rolls_up_when_empty(self):
+        self.comment(self.hot)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertContains(response, 'Обсуждаемый пост')
+
+    def test_tab_reads_cache(self):
+        self.comment(self.hot)
+        trending.rollup()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:trending'))
+        self.assertContains(response, 'Обсуждаемый пост')
+        self.assertContains(response, self.group.title)
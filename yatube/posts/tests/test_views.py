@@ -348,6 +348,20 @@ class PostViewsTest(TestCase):
         cache_2 = response.content
         self.assertEqual(cache_1, cache_2)
 
+    def test_profile_shows_new_post(self):
+        """После публикации автор сразу видит пост в своем профиле."""
+        url = reverse(
+            'posts:profile',
+            kwargs={'username': PostViewsTest.user.username}
+        )
+        self.authorized_user.get(url)
+        self.authorized_user.post(
+            reverse('posts:post_create'),
+            data={'text': 'Свежий пост после кэша.'},
+        )
+        response = self.authorized_user.get(url)
+        self.assertContains(response, 'Свежий пост после кэша.')
+
     def test_follow_unfollow(self):
         self.authorized_user.get(
             reverse(
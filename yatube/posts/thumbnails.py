@@ -0,0 +1,40 @@
+import posixpath
+
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.helpers import serialize, tokey
+
+from .models import Post
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    """Кладет миниатюры картинок постов в каталог с именем картинки.
+
+    По пути миниатюры cache/posts/…/имя.jpg/ключ.jpg view media находит
+    исходную картинку и проверяет, видна ли она, как и для самой
+    картинки.
+    """
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        if not source.name.startswith(Post.image.field.upload_to):
+            return super()._get_thumbnail_filename(
+                source, geometry_string, options
+            )
+        key = tokey(source.key, geometry_string, serialize(options))
+        return '{}{}/{}.{}'.format(
+            settings.THUMBNAIL_PREFIX,
+            source.name,
+            key,
+            EXTENSIONS[options['format']],
+        )
+
+
+def source_name(name):
+    """Картинка поста, из которой сделана миниатюра name, или None."""
+    prefix = settings.THUMBNAIL_PREFIX
+    if not name.startswith(prefix):
+        return None
+    source = posixpath.dirname(name[len(prefix):])
+    if source.startswith(Post.image.field.upload_to):
+        return source
+    return None
@@ -0,0 +1,121 @@
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import ActivityCounter, Group, Post, TrendingSnapshot
+
+TRENDING_KEY = 'trending'
+
+# Рейтинг всегда один: строка с этим id перезаписывается.
+SNAPSHOT_ID = 1
+
+
+def _bucket(moment):
+    seconds = int(moment.timestamp())
+    return datetime.fromtimestamp(
+        seconds - seconds % settings.TRENDING_BUCKET, timezone.utc
+    )
+
+
+def record(kind, object_id):
+    """Увеличивает счетчик объекта в текущем интервале."""
+    bucket = _bucket(timezone.now())
+    counters = ActivityCounter.objects.filter(
+        kind=kind, object_id=object_id, bucket=bucket
+    )
+    if counters.update(count=F('count') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ActivityCounter.objects.create(
+                kind=kind, object_id=object_id, bucket=bucket, count=1
+            )
+    except IntegrityError:
+        counters.update(count=F('count') + 1)
+
+
+def record_post(post):
+    if post.group_id:
+        record(ActivityCounter.GROUP_POSTS, post.group_id)
+
+
+def rollup(now=None):
+    """Пересчитывает рейтинг популярного и сохраняет его в базу.
+
+    Команда rollup_trending работает в своем процессе, поэтому рейтинг
+    хранится в базе, а кэш лишь на TRENDING_CACHE_TIME избавляет
+    вкладку от запроса.
+
+    Вклад интервала убывает вдвое каждые TRENDING_HALF_LIFE секунд,
+    интервалы старше TRENDING_WINDOW удаляются.
+    """
+    now = now or timezone.now()
+    ActivityCounter.objects.filter(
+        bucket__lt=now - timedelta(seconds=settings.TRENDING_WINDOW)
+    ).delete()
+    scores = {kind: Counter() for kind, _ in ActivityCounter.KINDS}
+    counters = ActivityCounter.objects.values_list(
+        'kind', 'object_id', 'bucket', 'count'
+    )
+    for kind, object_id, bucket, count in counters.iterator():
+        age = max((now - bucket).total_seconds(), 0)
+        scores[kind][object_id] += (
+            count * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+        )
+
+    top_posts = [
+        post_id for post_id, _ in scores[
+            ActivityCounter.POST_COMMENTS
+        ].most_common(settings.TRENDING_SIZE)
+    ]
+    posts = Post.objects.published().select_related(
+        'author', 'group'
+    ).in_bulk(top_posts)
+    top_groups = scores[ActivityCounter.GROUP_POSTS].most_common(
+        settings.TRENDING_SIZE
+    )
+    groups = Group.objects.filter(is_active=True).in_bulk(
+        [group_id for group_id, _ in top_groups]
+    )
+    data = {
+        'posts': [
+            render_to_string(
+                'posts/include/post.html', {'post': posts[post_id]}
+            )
+            for post_id in top_posts if post_id in posts
+        ],
+        'groups': [
+            {'slug': groups[group_id].slug, 'title': groups[group_id].title}
+            for group_id, _ in top_groups if group_id in groups
+        ],
+    }
+    TrendingSnapshot.objects.update_or_create(
+        pk=SNAPSHOT_ID,
+        defaults={'data': json.dumps(data), 'updated': now},
+    )
+    trending = {**data, 'updated': now}
+    cache.set(TRENDING_KEY, trending, settings.TRENDING_CACHE_TIME)
+    return trending
+
+
+def current():
+    """Рейтинг из кэша, иначе из базы.
+
+    Если rollup еще ни разу не запускался, рейтинг считается сразу.
+    """
+    trending = cache.get(TRENDING_KEY)
+    if trending is not None:
+        return trending
+    snapshot = TrendingSnapshot.objects.filter(pk=SNAPSHOT_ID).first()
+    if snapshot is None:
+        return rollup()
+    trending = {**json.loads(snapshot.data), 'updated': snapshot.updated}
+    cache.set(TRENDING_KEY, trending, settings.TRENDING_CACHE_TIME)
+    return trending
@@ -1,13 +1,17 @@
 from django.urls import path
 
-from . import views
+from . import syndication, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('create/', views.post_create, name='post_create'),
+    path('export/', views.profile_export, name='profile_export'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('groups/', views.group_index, name='group_index'),
+    path('groups.json', views.group_index_json, name='group_index_json'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path(
@@ -27,4 +31,26 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('sitemap.xml', syndication.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-posts-<int:year>-<int:month>.xml',
+        syndication.sitemap_posts,
+        name='sitemap_posts'
+    ),
+    path(
+        'sitemap-groups.xml',
+        syndication.sitemap_groups,
+        name='sitemap_groups'
+    ),
+    path('atom.xml', syndication.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/atom.xml',
+        syndication.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/atom.xml',
+        syndication.profile_feed,
+        name='profile_feed'
+    ),
 ]
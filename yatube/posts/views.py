@@ -1,21 +1,55 @@
+import os
+import posixpath
+
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.db.models import F
+from django.utils import timezone
 from django.views.decorators.cache import cache_page
 
-from .models import Follow, Group, Post, User
+from core.paginator import HasNextPaginator, versions
+from core.ratelimit import rate_limit
+from core.sendfile import send_file
+from .models import DeletionJob, Follow, Group, GroupStats, Post, User
 from yatube.settings import NUMBER_POSTS_PAGE, CACHE_STORAGE_TIME
+from . import (
+    authors, follows, group_stats, images, recommendations, thumbnails,
+    trending
+)
+from .export import export_path, iter_export, schedule_export
 from .forms import CommentForm, PostForm
 
 
 def _paginator(request, obj):
     """Возвращает page_obj"""
-    paginator = Paginator(obj, NUMBER_POSTS_PAGE)
+    paginator = HasNextPaginator(
+        obj, NUMBER_POSTS_PAGE, recent_field='pub_date'
+    )
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+def _save_post(request, form, post):
+    """Сохраняет пост, отдавая новую картинку на фоновую обработку."""
+    upload = request.FILES.get('image')
+    previous = form.initial.get('image')
+    if upload:
+        post.image = previous or ''
+        post.image_error = ''
+        if post.pk is None:
+            post.is_published = False
+    post.save()
+    if upload:
+        images.schedule(post, upload)
+    elif previous and not post.image:
+        Post.objects.filter(pk=post.pk).update(placeholder='')
+        images.release(previous.name)
+
+
 @login_required
+@rate_limit('comment')
 def add_comment(request, post_id):
     """Добавление комментария к посту."""
     post = get_object_or_404(Post, id=post_id)
@@ -30,13 +64,14 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    user = User.objects.get(username=request.user.username)
-    posts = Post.objects.filter(
-        author__following__user=user
+    posts = Post.objects.published().filter(
+        author__following__user=request.user
     )
     page_obj = _paginator(request, posts)
     context = {
         'page_obj': page_obj,
+        'stream_url': settings.SSE_URL,
+        'suggestions': recommendations.for_user(request.user),
     }
     template = 'posts/follow.html'
 
@@ -45,48 +80,102 @@ def follow_index(request):
 
 def group_posts(request, slug):
     """Настройка отображения страницы группы."""
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related(
+    group = get_object_or_404(Group, slug=slug, is_active=True)
+    posts = group.posts.published().select_related(
         'author',
         'group',
-    ).all()
+    )
     page_obj = _paginator(request, posts)
     context = {
         'page_obj': page_obj,
         'group': group,
+        'feed_version': versions(f'group:{group.id}'),
     }
     template = 'posts/group_list.html'
 
     return render(request, template, context)
 
 
+def _group_directory():
+    """Сводки активных групп с числом постов за неделю."""
+    today = timezone.localdate()
+    directory = list(
+        GroupStats.objects.filter(group__is_active=True).select_related(
+            'group'
+        ).order_by(F('latest_pub_date').desc(nulls_last=True), 'group_id')
+    )
+    for stats in directory:
+        stats.week_posts = group_stats.week_posts(stats, today)
+    return directory
+
+
+def group_index(request):
+    """Список групп, свежие сверху."""
+    context = {
+        'directory': _group_directory(),
+    }
+    template = 'posts/group_index.html'
+
+    return render(request, template, context)
+
+
+def group_index_json(request):
+    """Тот же список групп в JSON."""
+    groups = [
+        {
+            'slug': stats.group.slug,
+            'title': stats.group.title,
+            'post_count': stats.post_count,
+            'latest_post': stats.latest_post_id,
+            'latest_pub_date': stats.latest_pub_date,
+            'week_posts': stats.week_posts,
+        }
+        for stats in _group_directory()
+    ]
+    return JsonResponse({'groups': groups})
+
+
 @cache_page(CACHE_STORAGE_TIME, key_prefix='index_page')
 def index(request):
     """Настройка отображения главной страницы."""
-    posts = Post.objects.select_related(
+    posts = Post.objects.published().select_related(
         'author',
         'group',
-    ).all()
-    paginator = Paginator(posts, NUMBER_POSTS_PAGE)
+    )
+    paginator = HasNextPaginator(
+        posts, NUMBER_POSTS_PAGE, recent_field='pub_date'
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
         'page_obj': page_obj,
         'page_number': page_number,
+        'stream_url': settings.SSE_URL,
     }
     template = 'posts/index.html'
 
     return render(request, template, context)
 
 
+def trending_posts(request):
+    """Популярные посты и группы, заранее посчитанные rollup_trending."""
+    context = {
+        'trending': trending.current(),
+    }
+    template = 'posts/trending.html'
+
+    return render(request, template, context)
+
+
 @login_required
+@rate_limit('post')
 def post_create(request):
     """Создание нового поста."""
     form = PostForm(request.POST or None, files=request.FILES or None)
-    if form.is_valid():
+    if images.form_is_valid(request, form):
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        _save_post(request, form, post)
         return redirect('posts:profile', request.user.username)
     context = {
         'form': form,
@@ -98,18 +187,23 @@ def post_create(request):
 
 def post_detail(request, post_id):
     """Отображение подробной информации о посте."""
-    post = get_object_or_404(Post, pk=post_id)
-    post_comments = post.comments.select_related(
+    post = get_object_or_404(Post.objects.live(), pk=post_id)
+    if not post.is_published and post.author != request.user:
+        raise Http404
+    post_comments = authors.attach(post.comments.exclude(
+        author_id__in=DeletionJob.pending(DeletionJob.USER)
+    ).select_related(
         'author',
-    ).all()
-    posts_count = post.author.posts.count()
+    ))
+    card = authors.card(post.author_id)
     form = CommentForm()
     context = {
         'author_post': post.author,
+        'card': card,
         'form': form,
         'post': post,
         'post_comments': post_comments,
-        'posts_count': posts_count,
+        'posts_count': card.posts_count,
     }
     template = 'posts/post_detail.html'
 
@@ -129,8 +223,8 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
-    if form.is_valid():
-        form.save()
+    if images.form_is_valid(request, form):
+        _save_post(request, form, form.save(commit=False))
         return redirect('posts:post_detail', post_id)
     is_edit = True
     context = {
@@ -145,24 +239,36 @@ def post_edit(request, post_id):
 
 def profile(request, username):
     """Отображение личной страницы пользователя."""
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(
+    if username == request.user.get_username():
+        user = request.user
+    else:
+        user = get_object_or_404(
+            User.objects.exclude(pk__in=DeletionJob.pending(DeletionJob.USER)),
+            username=username,
+        )
+    posts = Post.objects.published().filter(
         author=user
     ).select_related(
         'author',
         'group',
-    ).all()
+    )
     page_obj = _paginator(request, posts)
-    posts_count = user.posts.count()
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=user
-    ).exists()
+    card = authors.card(user.id)
+    following = request.user.is_authenticated and follows.is_following(
+        request.user.id, user.id
+    )
+    failed = Post.objects.none()
+    if user == request.user:
+        failed = user.posts.exclude(image_error='').only('id', 'text')
     context = {
         'page_obj': page_obj,
         'author': user,
-        'posts_count': posts_count,
+        'card': card,
+        'feed_version': versions(f'author:{user.id}'),
+        'failed_posts': failed,
+        'posts_count': card.posts_count,
         'following': following,
+        'suggestions': recommendations.for_user(request.user),
     }
     template = 'posts/profile.html'
 
@@ -170,14 +276,11 @@ def profile(request, username):
 
 
 @login_required
+@rate_limit('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
-    if not following and author != request.user:
-        Follow.objects.create(
+    if author != request.user:
+        Follow.objects.get_or_create(
             user=request.user,
             author=author
         )
@@ -188,14 +291,48 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    control = Follow.objects.filter(
+    Follow.objects.filter(
         user=request.user,
         author=author
-    ).exists()
-    if control:
-        Follow.objects.filter(
-            user=request.user,
-            author=author
-        ).delete()
+    ).delete()
 
     return redirect('posts:profile', username)
+
+
+@login_required
+def profile_export(request):
+    """Выгрузка постов, комментариев и картинок пользователя архивом.
+
+    Пока собранного архива нет, данные отдаются потоком, а сборка
+    ставится в очередь: следующая выгрузка отдаст готовый файл.
+    """
+    filename = f'yatube-{request.user.username}.zip'
+    path = export_path(request.user)
+    if os.path.exists(path):
+        return send_file(
+            request, 'exports', os.path.relpath(path, settings.EXPORT_ROOT),
+            as_attachment=True, filename=filename,
+        )
+    schedule_export(request.user)
+    response = StreamingHttpResponse(
+        iter_export(request.user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def media(request, path):
+    """Файлы MEDIA_ROOT через send_file.
+
+    Картинку поста, который еще не опубликован или автор которого
+    удален, и ее миниатюры видит только автор.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    image = thumbnails.source_name(name) or name
+    if image.startswith(Post.image.field.upload_to):
+        posts = Post.objects.published()
+        if request.user.is_authenticated:
+            posts |= Post.objects.filter(author=request.user)
+        if not posts.filter(image=image).exists():
+            raise Http404
+    return send_file(request, 'media', name)
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -86,9 +87,36 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Используется бэкендом core.db.backends.postgresql_pool.
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'CHECK_INTERVAL': int(os.getenv('DB_POOL_CHECK_INTERVAL', 30)),
+        },
     }
 }
 
+# Реплики для чтения: адреса хостов через запятую (для SQLite — пути
+# к файлам баз).
+REPLICA_DATABASES = []
+
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    location = 'NAME' if 'sqlite3' in DATABASES['default']['ENGINE'] else 'HOST'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        location: replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Сколько секунд после записи читать данные пользователя с основной базы.
+REPLICA_PIN_SECONDS = 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -136,12 +164,208 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Общий кэш всех процессов — memcached, адреса через запятую. Без него
+# у каждого процесса свой locmem: то, что должен видеть каждый процесс,
+# например сессии или прогретые страницы, в таком кэше не хранится.
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+
+SHARED_CACHE = bool(CACHE_LOCATION)
+
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': CACHE_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
     }
-}
 
 NUMBER_POSTS_PAGE = 10
 
 CACHE_STORAGE_TIME = 20
+
+# Прогрев кэша лент командой warm_cache.
+CACHE_WARM_PAGES = 3
+
+CACHE_WARM_AUTHORS = 20
+
+CACHE_WARM_WORKERS = 4
+
+CACHE_WARM_HOST = os.getenv('CACHE_WARM_HOST', ALLOWED_HOSTS[0])
+
+CACHE_WARM_ON_MIGRATE = os.getenv('CACHE_WARM_ON_MIGRATE', '') == '1'
+
+# Поток новых постов (Server-Sent Events), команда runstream.
+SSE_URL = os.getenv('SSE_URL', '/events/')
+
+SSE_POLL_INTERVAL = 2
+
+SSE_HEARTBEAT = 15
+
+SSE_EVENT_RETENTION = 24 * 60 * 60
+
+# Импорт постов командой import_posts.
+IMPORT_BATCH_SIZE = 500
+
+IMPORT_IMAGE_WORKERS = 4
+
+# Готовые архивы с данными пользователей, не раздаются как media.
+EXPORT_ROOT = os.path.join(BASE_DIR, 'exports')
+
+# Карты сайта и Atom-ленты.
+SYNDICATION_CACHE_TIME = 24 * 60 * 60
+
+# Сколько последних id перед водяным знаком кэши лент перечитывают:
+# пост с меньшим id может зафиксироваться позже большего.
+SYNDICATION_OVERLAP = 100
+
+# Сколько записей карты сайта лежит в одном значении кэша.
+SYNDICATION_CHUNK_SIZE = 5000
+
+SITEMAP_LIMIT = 50000
+
+FEED_ITEMS = 20
+
+# Загрузка и обработка картинок постов.
+FILE_UPLOAD_HANDLERS = ['core.uploadhandlers.LimitedTemporaryFileUploadHandler']
+
+FILE_UPLOAD_MAX_SIZE = 15 * 1024 * 1024
+
+MAX_IMAGE_PIXELS = 40_000_000
+
+# Обрабатывать картинки прямо в запросе, а не задачей в очереди.
+IMAGE_PROCESSING_INLINE = os.getenv('IMAGE_PROCESSING_INLINE') == '1'
+
+# Через сколько секунд удаляется картинка, на которую больше не ссылаются
+# посты. Файл, сохраненный заново за это время, не удаляется.
+MEDIA_RELEASE_DELAY = 60 * 60
+
+# Загрузки ждут обработки здесь: каталог должен переживать перезапуск и
+# быть общим для веб-сервера и обработчиков задач.
+IMAGE_PROCESSING_DIR = os.getenv(
+    'IMAGE_PROCESSING_DIR', os.path.join(BASE_DIR, 'uploads')
+)
+
+# Статика: хэш в именах, сжатые копии и раздача без nginx.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+STATIC_SERVE = os.getenv('STATIC_SERVE', '') == '1'
+
+STATIC_MAX_AGE = 60 * 60
+
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# За сколько последних дней лента сначала ищет посты страницы: по этой
+# границе PostgreSQL читает только свежие помесячные секции.
+PAGINATOR_RECENT_DAYS = 31
+
+# Сколько секунд хранится кэш подписок пользователя. Без общего кэша
+# сброс после подписки виден только процессу, который ее принял, поэтому
+# остальные процессы держат список лишь несколько секунд.
+FOLLOW_CACHE_TIME = 24 * 60 * 60 if SHARED_CACHE else 10
+
+# Рекомендации подписок, пересчитываются командой build_recommendations.
+RECOMMENDATIONS_TOP = 20
+
+RECOMMENDATIONS_SHOWN = 5
+
+FOLLOW_GRAPH_PATH = os.path.join(BASE_DIR, 'data', 'follow_graph.pickle')
+
+# Инкрементальный пересчет рекомендаций приближенный: раз в столько
+# секунд build_recommendations пересчитывает всех пользователей.
+RECOMMENDATIONS_FULL_INTERVAL = 24 * 60 * 60
+
+# Вкладка «Популярное»: интервал счетчиков, окно и затухание, в секундах.
+TRENDING_BUCKET = 60 * 60
+
+TRENDING_WINDOW = 24 * 60 * 60
+
+TRENDING_HALF_LIFE = 6 * 60 * 60
+
+TRENDING_SIZE = 10
+
+# Сколько секунд процесс берет рейтинг из кэша, не читая его из базы.
+TRENDING_CACHE_TIME = 60
+
+# Ограничение частоты записи: размер корзины жетонов и время ее
+# наполнения в секундах для пользователя и для IP-адреса.
+RATE_LIMITS = {
+    'comment': {'user': (10, 60), 'ip': (60, 60)},
+    'post': {'user': (5, 60), 'ip': (30, 60)},
+    'follow': {'user': (30, 60), 'ip': (120, 60)},
+}
+
+# Заголовок с IP-адресом клиента, который выставляет прокси, в виде
+# ключа request.META, например HTTP_X_REAL_IP. Пусто — REMOTE_ADDR.
+CLIENT_IP_HEADER = os.getenv('CLIENT_IP_HEADER', '')
+
+# Сколько записей удаляется за одну транзакцию при фоновой очистке.
+DELETION_CHUNK_SIZE = 1000
+
+# На сколько месяцев вперед manage_partitions создает секции.
+PARTITION_MONTHS_AHEAD = 3
+
+# Сколько секунд хранится карточка автора со счетчиками. Счетчики
+# сбрасываются при изменениях, но без общего кэша сброс не доходит до
+# других процессов: там карточка живет несколько секунд.
+AUTHOR_CARD_CACHE_TIME = 24 * 60 * 60 if SHARED_CACHE else 10
+
+# С общим кэшем сессии читаются из кэша, а пользователь сессии — из
+# кэша CachedModelBackend, поэтому обычный запрос не ходит за ними в
+# базу. Без общего кэша выход или смена пароля в одном процессе не
+# видны остальным, и сессии хранятся только в базе.
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+# ModelBackend оставлен для сессий, открытых до его замены.
+AUTHENTICATION_BACKENDS = [
+    'core.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+AUTH_USER_CACHE_TIME = 5 * 60
+
+# Очередь фоновых задач core.tasks, обработчик run_tasks.
+TASK_WORKERS = 2
+
+TASK_BATCH_SIZE = 10
+
+TASK_POLL_INTERVAL = 1
+
+# Задержка первого повтора упавшей задачи, далее она удваивается.
+TASK_RETRY_DELAY = 30
+
+# Через сколько секунд задача упавшего обработчика возвращается в очередь.
+# Задача должна укладываться в это время, длинную работу она делит на
+# части и ставит в очередь продолжение.
+TASK_LOCK_TIMEOUT = 10 * 60
+
+# Письма-сводки о новых постах: адрес сайта для ссылок и сколько
+# получателей обрабатывается за одну пачку.
+SITE_URL = os.getenv('SITE_URL', f'https://{ALLOWED_HOSTS[0]}')
+
+NOTIFY_BATCH_SIZE = 200
+
+# Отдача media и архивов выгрузки: после проверки доступа файл передает
+# прокси. 'nginx' — X-Accel-Redirect, 'apache' — X-Sendfile, пусто —
+# отдает сам Django, что допустимо только с DEBUG: без него
+# manage.py check --deploy считает это ошибкой. Для каждого места
+# хранения: настройка с корнем на диске и internal-адрес в конфигурации
+# прокси.
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', '')
+
+SENDFILE_LOCATIONS = {
+    'media': ('MEDIA_ROOT', '/protected/media/'),
+    'exports': ('EXPORT_ROOT', '/protected/exports/'),
+}
+
+# Миниатюры картинок постов лежат в каталоге с именем картинки, чтобы
+# media проверял их видимость так же, как саму картинку.
+THUMBNAIL_BACKEND = 'posts.thumbnails.PostThumbnailBackend'